@@ -4,11 +4,17 @@ Build processed GIS data from raw ingested files.
 from __future__ import annotations
 
 import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Any
 
 import geopandas as gpd
+import shapely
 
 from opsdash.common import (
+    STRING_DTYPE,
     Paths,
     coerce_id_column,
     configure_logging,
@@ -16,6 +22,7 @@ from opsdash.common import (
     latest_subdir,
     normalize_arcgis_field,
     uniquify,
+    write_geoparquet,
 )
 
 LOGGER = logging.getLogger(__name__)
@@ -28,56 +35,71 @@ FILES = {
     "neighborhoods": "sarpy_neighborhoods.geojson",
 }
 
+PARCEL_ID_CANDIDATES = ("parcel_id", "parid", "par_id", "pin", "parcelno", "parcel_no")
+NEIGHBORHOOD_NAME_CANDIDATES = frozenset(("name", "neighborhood", "neighborhood_name", "nbrhd", "nbrhd_name"))
+
+
+def _first_objectid_column(columns: list[str]) -> str | None:
+    return next((c for c in columns if c == "objectid" or c.startswith("objectid_")), None)
+
 
 def to_processed(gdf: gpd.GeoDataFrame, kind: str) -> gpd.GeoDataFrame:
-    out = gdf.copy()
+    """
+    Normalize a freshly read raw layer. Takes ownership of gdf: its columns are
+    renamed and derived columns added in place, so no full-frame copy is made.
+
+    Derived id and label columns are STRING_DTYPE. Missing source values stay <NA>
+    rather than becoming the strings "nan" / "None" (as astype(str) did on
+    pandas < 3), so 05/06 and the app drop them from groupings and rollups instead
+    of reporting a "nan" / "None" zoning code or neighborhood.
+    """
+    if kind not in ("parcels", "zoning", "neighborhoods"):
+        raise ValueError(f"Unknown kind: {kind}")
 
-    out.columns = uniquify([normalize_arcgis_field(c) for c in out.columns])
-    out = ensure_crs(out, TARGET_CRS_EPSG)
+    # One rename, one CRS pass, one validity ufunc
+    gdf.columns = uniquify([normalize_arcgis_field(c) for c in gdf.columns])
+    out = ensure_crs(gdf, TARGET_CRS_EPSG)
 
-    out["geom_is_valid"] = out.geometry.is_valid
+    columns = list(out.columns)
+    derived: dict[str, Any] = {"geom_is_valid": shapely.is_valid(out.geometry.values)}
 
     if kind == "parcels":
-        out["parcel_id"] = coerce_id_column(
-            out,
-            candidates=("parcel_id", "parid", "par_id", "pin", "parcelno", "parcel_no"),
-            fallback="objectid",
-        )
+        derived["parcel_id"] = coerce_id_column(out, candidates=PARCEL_ID_CANDIDATES, fallback="objectid")
 
     elif kind == "zoning":
-        oid_candidates = [c for c in out.columns if c == "objectid" or c.startswith("objectid_")]
-        if not oid_candidates:
+        oid_col = _first_objectid_column(columns)
+        if oid_col is None:
             raise ValueError("No objectid-like column found in zoning after normalization.")
-        oid_col = oid_candidates[0]
-
-        out["zoning_id"] = out[oid_col].astype(str)
 
+        derived["zoning_id"] = out[oid_col].astype(STRING_DTYPE)
         if "zoneclass" in out.columns:
-            out["zoning_code"] = out["zoneclass"].astype(str)
+            derived["zoning_code"] = out["zoneclass"].astype(STRING_DTYPE)
         if "zonedesc" in out.columns:
-            out["zoning_desc"] = out["zonedesc"].astype(str)
-        if "jurisdiction" in out.columns:
-            out["jurisdiction"] = out["jurisdiction"]
-
-    elif kind == "neighborhoods":
-        oid_candidates = [c for c in out.columns if c == "objectid" or c.startswith("objectid_")]
-        if oid_candidates:
-            out["neighborhood_id"] = out[oid_candidates[0]].astype(str)
-
-        name_candidates = [
-            c
-            for c in out.columns
-            if c in ("name", "neighborhood", "neighborhood_name", "nbrhd", "nbrhd_name")
-        ]
-        if name_candidates:
-            out["neighborhood_name"] = out[name_candidates[0]].astype(str)
+            derived["zoning_desc"] = out["zonedesc"].astype(STRING_DTYPE)
 
     else:
-        raise ValueError(f"Unknown kind: {kind}")
+        oid_col = _first_objectid_column(columns)
+        if oid_col is not None:
+            derived["neighborhood_id"] = out[oid_col].astype(STRING_DTYPE)
 
+        name_col = next((c for c in columns if c in NEIGHBORHOOD_NAME_CANDIDATES), None)
+        if name_col is not None:
+            derived["neighborhood_name"] = out[name_col].astype(STRING_DTYPE)
+
+    for name, values in derived.items():
+        out[name] = values
     return out
 
 
+def convert_one(kind: str, src: Path, out_path: Path) -> tuple[int, int, float]:
+    """Read one raw GeoJSON, process it, and write parquet. Runs in a worker process."""
+    t0 = time.perf_counter()
+    # pyogrio + Arrow stream reads features in bulk instead of one Python dict per feature
+    processed = to_processed(gpd.read_file(src, engine="pyogrio", use_arrow=True), kind)
+    write_geoparquet(processed, out_path)
+    return len(processed), len(processed.columns), time.perf_counter() - t0
+
+
 def main() -> int:
     configure_logging()
     paths = Paths()
@@ -86,20 +108,31 @@ def main() -> int:
     raw_dir = latest_subdir(paths.raw_root)
     LOGGER.info("Using raw dir: %s", raw_dir)
 
+    tasks: list[tuple[str, Path, Path]] = []
     for kind, filename in FILES.items():
         src = raw_dir / filename
         if not src.exists():
             LOGGER.warning("Skipping %s: not found (%s)", kind, src.name)
             continue
-
-        LOGGER.info("Reading %s: %s", kind, src.name)
-        gdf = gpd.read_file(src)
-
-        processed = to_processed(gdf, kind)
-        out_path = paths.processed_dir / f"{kind}.parquet"
-        processed.to_parquet(out_path, index=False)
-
-        LOGGER.info("Wrote %s (rows=%s, cols=%s)", out_path, f"{len(processed):,}", f"{len(processed.columns):,}")
+        tasks.append((kind, src, paths.processed_dir / f"{kind}.parquet"))
+
+    if not tasks:
+        return 0
+
+    # Each file is independent and CPU-bound (GeoJSON parse + geometry ops).
+    with ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as ex:
+        futures = {ex.submit(convert_one, *task): task for task in tasks}
+        for fut in as_completed(futures):
+            kind, src, out_path = futures[fut]
+            rows, cols, elapsed = fut.result()
+            LOGGER.info(
+                "Wrote %s from %s (rows=%s, cols=%s, %.1fs)",
+                out_path,
+                src.name,
+                f"{rows:,}",
+                f"{cols:,}",
+                elapsed,
+            )
 
     return 0
 
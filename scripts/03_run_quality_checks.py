@@ -9,31 +9,95 @@ from pathlib import Path
 from typing import Any
 
 import geopandas as gpd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyproj
+import shapely
 
 from opsdash.common import Paths, configure_logging
 
 LOGGER = logging.getLogger(__name__)
 
+BATCH_SIZE = 200_000
 
-def build_report(gdf: gpd.GeoDataFrame) -> dict[str, Any]:
-    n = len(gdf)
-    bbox = gdf.total_bounds.tolist() if n else [None, None, None, None]
 
-    if "parcel_id" not in gdf.columns:
+def geoarrow_bounds(geometry: pa.Array) -> np.ndarray | None:
+    """
+    [xmin, ymin, xmax, ymax] straight from GeoArrow coordinate buffers.
+
+    Returns None for non-GeoArrow (e.g. WKB) geometry so callers can fall back to shapely.
+    """
+    coords = geometry
+    while pa.types.is_list(coords.type) or pa.types.is_large_list(coords.type):
+        coords = coords.flatten()
+    if not pa.types.is_struct(coords.type):
+        return None
+
+    x = pc.min_max(coords.field("x"))
+    y = pc.min_max(coords.field("y"))
+    return np.array([x["min"].as_py(), y["min"].as_py(), x["max"].as_py(), y["max"].as_py()], dtype=float)
+
+
+def build_report(parcels_path: Path, *, batch_size: int = BATCH_SIZE) -> dict[str, Any]:
+    """
+    Stream parcels.parquet in record batches and accumulate the report counts,
+    so peak memory is one batch rather than the whole GeoDataFrame.
+    """
+    dataset = ds.dataset(parcels_path, format="parquet")
+    if "parcel_id" not in dataset.schema.names:
         raise ValueError("Expected 'parcel_id' column in parcels.parquet")
 
-    missing_parcel_id = int(gdf["parcel_id"].isna().sum())
-    dup_parcel_id = int(gdf["parcel_id"].duplicated().sum())
+    # CRS comes from the GeoParquet 'geo' metadata, same as gpd.read_parquet
+    geo_meta = json.loads(dataset.schema.metadata[b"geo"])
+    crs = pyproj.CRS.from_user_input(geo_meta["columns"]["geometry"].get("crs", "OGC:CRS84"))
+
+    n = 0
+    missing_parcel_id = 0
+    parcel_id_uniques: list[pa.Array] = []
+    geom_missing = 0
+    geom_valid = 0
+    lo = np.full(2, np.nan)
+    hi = np.full(2, np.nan)
+
+    scanner = dataset.scanner(columns=["parcel_id", "geometry"], batch_size=batch_size)
+    for batch in scanner.to_batches():
+        if batch.num_rows == 0:
+            continue
+        n += batch.num_rows
+
+        ids = batch.column("parcel_id")
+        missing_parcel_id += ids.null_count
+        parcel_id_uniques.append(pc.unique(ids))
+
+        part = gpd.GeoDataFrame.from_arrow(pa.Table.from_batches([batch]))
+
+        # Vectorized GEOS predicates on the raw geometry array (no GeoSeries wrapping)
+        geoms = np.asarray(part.geometry.values)
+        missing = shapely.is_missing(geoms)
+        geom_missing += int(missing.sum())
+        geom_valid += int((shapely.is_valid(geoms) & ~missing).sum())
+
+        # fmin/fmax ignore NaN bounds from missing or empty geometries
+        bounds = geoarrow_bounds(batch.column("geometry"))
+        if bounds is None:
+            bounds = part.geometry.total_bounds
+        lo = np.fmin(lo, bounds[:2])
+        hi = np.fmax(hi, bounds[2:])
+
+    # pandas-style duplicated(): nulls compare equal, so count them as one value
+    n_distinct = pc.count_distinct(pa.chunked_array(parcel_id_uniques), mode="all").as_py() if n else 0
+    dup_parcel_id = n - n_distinct
 
-    geom_missing = int(gdf.geometry.isna().sum())
-    geom_valid = int(gdf.geometry.is_valid.sum()) if n else 0
     geom_invalid = int(n - geom_valid - geom_missing)
     valid_rate = (geom_valid / n) if n else None
+    bbox = [float(lo[0]), float(lo[1]), float(hi[0]), float(hi[1])] if n else [None, None, None, None]
 
     return {
         "dataset": "sarpy_tax_parcels",
         "rows": n,
-        "crs": str(gdf.crs),
+        "crs": str(crs),
         "bbox_wgs84": bbox,
         "parcel_id_missing": missing_parcel_id,
         "parcel_id_duplicates": dup_parcel_id,
@@ -72,8 +136,7 @@ def main() -> int:
     if not parcels_path.exists():
         raise FileNotFoundError(f"Missing {parcels_path}. Run scripts/02_build_processed.py first.")
 
-    gdf = gpd.read_parquet(parcels_path)
-    report = build_report(gdf)
+    report = build_report(parcels_path)
 
     out_json = paths.processed_dir / "data_quality_report_parcels.json"
     out_md = paths.processed_dir / "data_quality_report_parcels.md"
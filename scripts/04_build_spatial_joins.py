@@ -6,11 +6,43 @@ from __future__ import annotations
 import logging
 
 import geopandas as gpd
+import numpy as np
+from shapely import STRtree
 
-from opsdash.common import Paths, configure_logging, ensure_crs
+from opsdash.common import (
+    Paths,
+    configure_logging,
+    ensure_crs,
+    parquet_columns,
+    write_geoparquet,
+)
 
 LOGGER = logging.getLogger(__name__)
 TARGET_CRS_EPSG = 4326
+BBOX_PAD = 0.01  # degrees
+
+
+def join_parcels_to_zoning(parcels: gpd.GeoDataFrame, zoning: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    Left-join zoning attributes onto parcels where the geometries intersect.
+
+    Equivalent to gpd.sjoin(how="left", predicate="intersects") but issues a single
+    batched STRtree query and never builds an intermediate joined frame.
+    Parcels with no match are kept once with null zoning attributes.
+    """
+    tree = STRtree(zoning.geometry.values)
+    parcel_idx, zoning_idx = tree.query(parcels.geometry.values, predicate="intersects")
+
+    unmatched = np.setdiff1d(np.arange(len(parcels)), parcel_idx)
+    left = np.concatenate([parcel_idx, unmatched])
+    right = np.concatenate([zoning_idx, np.full(len(unmatched), -1)])
+
+    # Keep parcel order stable, as sjoin does
+    order = np.argsort(left, kind="stable")
+    left, right = left[order], right[order]
+
+    attrs = zoning.drop(columns="geometry").reset_index(drop=True).reindex(right).reset_index(drop=True)
+    return parcels.iloc[left].reset_index(drop=True).join(attrs)
 
 
 def main() -> int:
@@ -26,8 +58,12 @@ def main() -> int:
     if not zoning_path.exists():
         raise FileNotFoundError(f"Missing {zoning_path}. Run scripts/02_build_processed.py first.")
 
-    parcels = ensure_crs(gpd.read_parquet(parcels_path), TARGET_CRS_EPSG)
-    zoning = ensure_crs(gpd.read_parquet(zoning_path), TARGET_CRS_EPSG)
+    # Only read the columns the join carries forward; ArcGIS exports are wide.
+    parcel_cols = parquet_columns(parcels_path, ("parcel_id", "jurisdiction", "geometry"))
+    zoning_cols = parquet_columns(zoning_path, ("zoning_id", "zoning_code", "zoning_desc", "geometry"))
+
+    parcels = ensure_crs(gpd.read_parquet(parcels_path, columns=parcel_cols), TARGET_CRS_EPSG)
+    zoning = ensure_crs(gpd.read_parquet(zoning_path, columns=zoning_cols), TARGET_CRS_EPSG)
 
     required_parcels = {"parcel_id"}
     required_zoning = {"zoning_id", "zoning_code"}
@@ -36,15 +72,15 @@ def main() -> int:
     if required_zoning - set(zoning.columns):
         raise ValueError(f"Missing required zoning columns: {sorted(required_zoning - set(zoning.columns))}")
 
-    zoning_cols = ["zoning_id", "zoning_code"]
-    if "zoning_desc" in zoning.columns:
-        zoning_cols.append("zoning_desc")
-    zoning_cols.append("geometry")
+    if len(parcels):
+        # Partial-area runs only touch a corner of the county: keep the STRtree to
+        # zoning polygons whose envelope overlaps the parcel extent.
+        minx, miny, maxx, maxy = parcels.total_bounds
+        zoning = zoning.cx[minx - BBOX_PAD:maxx + BBOX_PAD, miny - BBOX_PAD:maxy + BBOX_PAD]
 
-    joined = gpd.sjoin(parcels, zoning[zoning_cols], how="left", predicate="intersects")
-    joined = joined.drop(columns=["index_right"], errors="ignore")
+    joined = join_parcels_to_zoning(parcels, zoning)
 
-    joined.to_parquet(out_path, index=False)
+    write_geoparquet(joined, out_path)
 
     matched = int(joined["zoning_code"].notna().sum())
     total = len(joined)
@@ -4,10 +4,20 @@ Checks for deduplication of parcels with zoning data.
 from __future__ import annotations
 
 import logging
+from pathlib import Path
 
 import geopandas as gpd
-
-from opsdash.common import Paths, configure_logging, ensure_crs
+import numpy as np
+import shapely
+
+from opsdash.common import (
+    Paths,
+    configure_logging,
+    ensure_crs,
+    parquet_columns,
+    repair_geometry,
+    write_geoparquet,
+)
 
 LOGGER = logging.getLogger(__name__)
 
@@ -15,6 +25,14 @@ TARGET_CRS_EPSG = 4326
 AREA_CRS_EPSG = 26914  # UTM 14N
 
 
+def write_clustered_by_zoning(gdf: gpd.GeoDataFrame, out_path: Path) -> None:
+    """
+    Write with rows grouped by zoning_code so each row group's min/max statistics
+    cover few codes, letting readers prune with filters=[("zoning_code", "==", ...)].
+    """
+    write_geoparquet(gdf.sort_values("zoning_code", kind="stable", na_position="last"), out_path)
+
+
 def main() -> int:
     configure_logging()
     paths = Paths()
@@ -29,7 +47,8 @@ def main() -> int:
         raise FileNotFoundError(f"Missing {zoning_path}. Run scripts/02_build_processed.py first.")
 
     joined = ensure_crs(gpd.read_parquet(joined_path), TARGET_CRS_EPSG)
-    zoning = ensure_crs(gpd.read_parquet(zoning_path), TARGET_CRS_EPSG)
+    zoning_cols = parquet_columns(zoning_path, ("zoning_code", "zoning_desc", "geometry"))
+    zoning = ensure_crs(gpd.read_parquet(zoning_path, columns=zoning_cols), TARGET_CRS_EPSG)
 
     for col in ("parcel_id", "zoning_code"):
         if col not in joined.columns:
@@ -38,46 +57,51 @@ def main() -> int:
         raise ValueError("Expected zoning_code in zoning.parquet")
 
     base = joined.drop_duplicates("parcel_id").copy()
-    counts = joined.groupby("parcel_id")["zoning_code"].nunique(dropna=True)
-    multi_parcels = counts[counts > 1].index
+    # Distinct (parcel, zoning_code) pairs: per-parcel size() is the nunique we need,
+    # and the multi-match subset is directly the candidate table.
+    pairs = joined[["parcel_id", "zoning_code"]].dropna(subset=["zoning_code"]).drop_duplicates()
+    is_multi = pairs.groupby("parcel_id")["zoning_code"].transform("size").to_numpy() > 1
+    n_multi = pairs.loc[is_multi, "parcel_id"].nunique()
 
     LOGGER.info("Parcels total: %s", f"{base['parcel_id'].nunique():,}")
-    LOGGER.info("Parcels with multiple zoning matches: %s", f"{len(multi_parcels):,}")
+    LOGGER.info("Parcels with multiple zoning matches: %s", f"{n_multi:,}")
+
+    # Each parcel is projected to the area CRS exactly once; its area is stored so the
+    # dashboard can roll up parcel acres without decoding or reprojecting geometry.
+    parcels_area = base.set_index("parcel_id").geometry.to_crs(AREA_CRS_EPSG)
+    base["parcel_area_m2"] = shapely.area(np.asarray(parcels_area.values))
 
-    if len(multi_parcels) == 0:
-        base.to_parquet(out_path, index=False)
+    if n_multi == 0:
+        write_clustered_by_zoning(base, out_path)
         LOGGER.info("Wrote: %s (no overlaps found)", out_path)
         return 0
 
-    cand = (
-        joined.loc[joined["parcel_id"].isin(multi_parcels), ["parcel_id", "zoning_code"]]
-        .drop_duplicates()
-        .copy()
-    )
+    # Per-row group sizes mark multi-match pairs by position; no membership lookup needed
+    cand = pairs[is_multi]
 
-    parcels_geom = base[["parcel_id", "geometry"]].copy()
-    zoning_geom = zoning[["zoning_code", "geometry"]].drop_duplicates("zoning_code").copy()
+    # Project each zoning polygon to the area CRS exactly once too, then align both to
+    # the candidate pairs by position. Merging geometries into `cand` first would
+    # re-project a zoning polygon once per overlapping parcel.
+    # Zoning is repaired after projecting (as in 07 and the app), since projection can
+    # make a valid ring self-intersect; one invalid polygon would otherwise make GEOS
+    # raise a TopologyException in the intersection.
+    zoning_area = repair_geometry(zoning[["zoning_code", "geometry"]].to_crs(AREA_CRS_EPSG))
+    zoning_area = zoning_area.drop_duplicates("zoning_code").set_index("zoning_code").geometry
 
-    cand = cand.merge(parcels_geom, on="parcel_id", how="left")
-    cand = gpd.GeoDataFrame(cand, geometry="geometry", crs=joined.crs)
+    parcel_geoms = np.asarray(parcels_area.values)[parcels_area.index.get_indexer(cand["parcel_id"])]
+    invalid = ~shapely.is_valid(parcel_geoms)
+    parcel_geoms[invalid] = shapely.make_valid(parcel_geoms[invalid])
 
-    cand = cand.merge(
-        zoning_geom.rename(columns={"geometry": "zoning_geom"}),
-        on="zoning_code",
-        how="left",
-    )
+    # Codes whose only geometries were empty have no polygon left: no overlap
+    zoning_idx = zoning_area.index.get_indexer(cand["zoning_code"])
+    zoning_geoms = np.where(zoning_idx >= 0, np.asarray(zoning_area.values)[zoning_idx], None)
 
-    cand_area = cand.to_crs(AREA_CRS_EPSG)
-    zoning_geom_series = gpd.GeoSeries(cand_area["zoning_geom"], index=cand_area.index).set_crs(
-        AREA_CRS_EPSG, allow_override=True
-    )
-    cand_area["overlap_area_m2"] = cand_area.geometry.intersection(zoning_geom_series).area
+    # Raw GEOS ufuncs on aligned arrays; no GeoSeries index alignment per call
+    overlap = np.nan_to_num(shapely.area(shapely.intersection(parcel_geoms, zoning_geoms)), nan=0.0)
+    cand_area = cand.assign(overlap_area_m2=overlap)
 
-    best = (
-        cand_area.sort_values(["parcel_id", "overlap_area_m2"], ascending=[True, False])
-        .drop_duplicates("parcel_id")[["parcel_id", "zoning_code"]]
-        .copy()
-    )
+    # One-pass argmax per parcel; ties keep the first candidate, as the old sort did
+    best = cand_area.loc[cand_area.groupby("parcel_id")["overlap_area_m2"].idxmax(), ["parcel_id", "zoning_code"]]
 
     base = base.drop(columns=[c for c in ("zoning_code", "zoning_desc") if c in base.columns], errors="ignore")
     base = base.merge(best, on="parcel_id", how="left")
@@ -86,7 +110,7 @@ def main() -> int:
         desc = zoning[["zoning_code", "zoning_desc"]].drop_duplicates("zoning_code")
         base = base.merge(desc, on="zoning_code", how="left")
 
-    base.to_parquet(out_path, index=False)
+    write_clustered_by_zoning(base, out_path)
 
     matched = int(base["zoning_code"].notna().sum())
     total = len(base)
@@ -5,10 +5,10 @@ from __future__ import annotations
 
 import logging
 
-import geopandas as gpd
 import pandas as pd
+import pyarrow.parquet as pq
 
-from opsdash.common import Paths, configure_logging
+from opsdash.common import Paths, configure_logging, parquet_columns
 
 LOGGER = logging.getLogger(__name__)
 
@@ -23,21 +23,24 @@ def main() -> int:
     if not in_path.exists():
         raise FileNotFoundError(f"Missing {in_path}. Run scripts/05_dedup_parcels_with_zoning.py first.")
 
-    gdf = gpd.read_parquet(in_path)
-
-    required = {"parcel_id", "zoning_id"}
-    missing = required - set(gdf.columns)
+    required = ("parcel_id", "zoning_id")
+    missing = set(required) - set(parquet_columns(in_path, required))
     if missing:
         raise ValueError(f"Missing required columns in {in_path.name}: {sorted(missing)}")
 
-    grp = gdf.groupby("zoning_id", dropna=False)
+    # Geometry is never used here; read the two columns straight into Arrow and
+    # hash-aggregate there instead of going through a pandas groupby.
+    table = pq.read_table(in_path, columns=list(required))
+    agg = table.group_by("zoning_id").aggregate([("parcel_id", "count_distinct")])
+
     out = (
         pd.DataFrame(
             {
-                "zoning_label": grp["zoning_id"].first(),
-                "parcel_count": grp["parcel_id"].nunique(),
+                "zoning_label": agg.column("zoning_id").to_pandas(),
+                "parcel_count": agg.column("parcel_id_count_distinct").to_pandas(),
             }
         )
+        .sort_values("zoning_label", na_position="last", kind="stable")
         .reset_index(drop=True)
     )
 
@@ -7,7 +7,15 @@ import logging
 
 import geopandas as gpd
 
-from opsdash.common import Paths, configure_logging, ensure_crs, repair_geometry
+from opsdash.common import (
+    Paths,
+    configure_logging,
+    dissolve_by,
+    ensure_crs,
+    parquet_columns,
+    repair_geometry,
+    write_geoparquet,
+)
 
 LOGGER = logging.getLogger(__name__)
 
@@ -25,34 +33,33 @@ def main() -> int:
     if not in_path.exists():
         raise FileNotFoundError(f"Missing {in_path}. Run scripts/02_build_processed.py first.")
 
-    zoning = gpd.read_parquet(in_path)
+    columns = parquet_columns(in_path, ("zoning_code", "zoning_desc", "geometry"))
+    zoning = gpd.read_parquet(in_path, columns=columns)
     zoning = ensure_crs(zoning, WGS84_EPSG)
 
     if "zoning_code" not in zoning.columns:
         raise ValueError("Expected zoning_code in zoning.parquet (from ZONECLASS).")
 
-    zoning = zoning.copy()
     zoning["zoning_label"] = zoning["zoning_code"].astype(str)
 
-    keep = ["zoning_label", "geometry"]
+    desc_lookup = None
     if "zoning_desc" in zoning.columns:
-        keep.append("zoning_desc")
-    zoning = zoning[keep].copy()
+        desc_lookup = zoning[["zoning_label", "zoning_desc"]].dropna().drop_duplicates("zoning_label")
+
+    # zoning_desc is merged back after the dissolve, so it is not carried through
+    # the projection, repair and dissolve. 02's geom_is_valid is not read: it was
+    # computed in WGS84 and says nothing about validity after projection.
+    zoning = zoning[["zoning_label", "geometry"]]
 
     zoning_work = zoning.to_crs(WORK_CRS_EPSG)
     zoning_work = repair_geometry(zoning_work)
 
-    desc_lookup = None
-    if "zoning_desc" in zoning_work.columns:
-        desc_lookup = zoning_work[["zoning_label", "zoning_desc"]].dropna().drop_duplicates("zoning_label")
-
-    dissolved = zoning_work[["zoning_label", "geometry"]].dissolve(by="zoning_label", as_index=False)
-    dissolved = dissolved.to_crs(WGS84_EPSG)
+    dissolved = dissolve_by(zoning_work, "zoning_label").to_crs(WGS84_EPSG)
 
     if desc_lookup is not None:
         dissolved = dissolved.merge(desc_lookup, on="zoning_label", how="left")
 
-    dissolved.to_parquet(out_path, index=False)
+    write_geoparquet(dissolved, out_path)
     LOGGER.info("Wrote: %s", out_path)
     return 0
 
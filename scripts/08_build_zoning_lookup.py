@@ -3,11 +3,12 @@ Create a lookup table of zoning_id to descriptive zoning names.
 """
 from __future__ import annotations
 
+import argparse
 import logging
 
-import geopandas as gpd
+import pandas as pd
 
-from opsdash.common import Paths, configure_logging
+from opsdash.common import Paths, configure_logging, parquet_columns
 
 LOGGER = logging.getLogger(__name__)
 
@@ -23,29 +24,43 @@ CANDIDATE_LABEL_COLS = (
 )
 
 
-def main() -> int:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--csv", action="store_true", help="Also write zoning_lookup.csv for manual inspection.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
     configure_logging()
     paths = Paths()
 
     zoning_path = paths.processed_dir / "zoning.parquet"
-    out_path = paths.processed_dir / "zoning_lookup.csv"
+    out_path = paths.processed_dir / "zoning_lookup.parquet"
 
     if not zoning_path.exists():
         raise FileNotFoundError(f"Missing {zoning_path}. Run scripts/02_build_processed.py first.")
 
-    z = gpd.read_parquet(zoning_path)
-    if "zoning_id" not in z.columns:
+    # Geometry is never used here, so read only the id and label columns as plain
+    # pandas and skip the WKB -> shapely decode of the whole layer.
+    columns = parquet_columns(zoning_path, ("zoning_id", *CANDIDATE_LABEL_COLS))
+    if "zoning_id" not in columns:
         raise ValueError("Expected zoning_id in zoning.parquet")
 
-    label_col = next((c for c in CANDIDATE_LABEL_COLS if c in z.columns), None)
+    label_col = next((c for c in CANDIDATE_LABEL_COLS if c in columns), None)
 
-    z = z.copy()
+    z = pd.read_parquet(zoning_path, columns=["zoning_id"] + ([label_col] if label_col else []))
     z["zoning_name"] = z[label_col].astype(str) if label_col else z["zoning_id"].astype(str)
 
     out = z[["zoning_id", "zoning_name"]].drop_duplicates("zoning_id")
-    out.to_csv(out_path, index=False)
-
+    out.to_parquet(out_path, index=False, compression="zstd")
     LOGGER.info("Wrote: %s", out_path)
+
+    if args.csv:
+        csv_path = out_path.with_suffix(".csv")
+        out.to_csv(csv_path, index=False)
+        LOGGER.info("Wrote: %s", csv_path)
+
     LOGGER.info("Label source: %s", label_col or "zoning_id")
     return 0
 
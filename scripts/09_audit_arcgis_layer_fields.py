@@ -9,6 +9,8 @@ from typing import Any
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from opsdash.common import configure_logging
 
@@ -16,8 +18,30 @@ LOGGER = logging.getLogger(__name__)
 DEFAULT_TIMEOUT_S = 60
 
 
-def post_form(url: str, data: dict[str, Any], timeout_s: int = DEFAULT_TIMEOUT_S) -> dict[str, Any]:
-    resp = requests.post(url, data=data, timeout=timeout_s)
+def make_session() -> requests.Session:
+    """
+    Session with a small keep-alive pool and retries, so repeated calls (paging,
+    several layers) reuse one TCP/TLS connection. The metadata POSTs are read-only,
+    so POST is safe to retry.
+    """
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+    )
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry))
+    return session
+
+
+def post_form(
+    session: requests.Session,
+    url: str,
+    data: dict[str, Any],
+    timeout_s: int = DEFAULT_TIMEOUT_S,
+) -> dict[str, Any]:
+    resp = session.post(url, data=data, timeout=timeout_s)
     resp.raise_for_status()
     return resp.json()
 
@@ -30,7 +54,8 @@ def main() -> int:
     if not url:
         raise ValueError("Set SARPY_ZONING_LAYER_URL in .env")
 
-    meta = post_form(url, {"f": "pjson"})
+    with make_session() as session:
+        meta = post_form(session, url, {"f": "pjson"})
     fields = meta.get("fields", []) or []
 
     LOGGER.info("Layer: %s", meta.get("name"))
@@ -1,17 +1,30 @@
 from __future__ import annotations
 
-import json
 import logging
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Optional
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import pydeck as pdk
+import shapely
 import streamlit as st
 
-from opsdash.common import Paths, configure_logging, ensure_crs, repair_geometry
+from opsdash.common import (
+    STRING_DTYPE,
+    Paths,
+    configure_logging,
+    dissolve_by,
+    ensure_crs,
+    parquet_columns,
+    repair_geometry,
+)
 
 LOGGER = logging.getLogger(__name__)
 
@@ -21,6 +34,35 @@ LOGGER = logging.getLogger(__name__)
 WGS84_EPSG = 4326
 WORK_CRS_EPSG = 26914  # UTM 14N (good for Sarpy County geometry ops)
 M2_TO_ACRES = 0.0002471053814671653  # exact conversion
+MAP_SIMPLIFY_TOLERANCE_DEG = 5e-4  # ~50 m; well below what zoom ~9.5 can show
+MAP_COORD_DECIMALS = 6  # ~0.1 m; float32-level precision for deck.gl
+SELECTION_CACHE_ENTRIES = 8  # per-jurisdiction-selection caches keep the most recent selections
+
+# 6-step choropleth ramp (RGBA). Light -> Dark.
+FILL_PALETTE = np.array(
+    [
+        [247, 252, 245, 200],
+        [199, 233, 192, 200],
+        [116, 196, 118, 200],
+        [49, 163, 84, 200],
+        [0, 109, 44, 200],
+        [0, 68, 27, 200],
+    ],
+    dtype=np.uint8,
+)
+
+# Per-polygon fields sent to deck.gl: the fill color plus what build_tooltip() shows
+MAP_PROPERTY_COLUMNS = (
+    "fill_color",
+    "zoning_label",
+    "zoning_desc",
+    "metric_value",
+    "parcel_count",
+    "total_parcel_area_acres",
+    "median_parcel_area_acres",
+    "zoning_area_acres",
+    "pct_jurisdiction_land_area_pct",
+)
 
 PATHS = Paths()
 PARCELS_PATH = PATHS.processed_dir / "parcels_with_zoning_1to1.parquet"
@@ -31,12 +73,76 @@ ZONING_RAW_PATH = PATHS.processed_dir / "zoning.parquet"  # raw polygons (has ju
 # Data loading (cached)
 # -------------------------------------------------------------------
 @st.cache_data(show_spinner=True)
-def load_gdf_parquet(path: Path, mtime: float, epsg: int = WGS84_EPSG) -> gpd.GeoDataFrame:
-    """Cached reader for GeoParquet. `mtime` is part of the cache key."""
+def load_gdf_parquet(
+    path: Path,
+    mtime: float,
+    epsg: int = WGS84_EPSG,
+    categorical: tuple[str, ...] = (),
+) -> gpd.GeoDataFrame:
+    """
+    Cached reader for GeoParquet. `mtime` is part of the cache key.
+    Columns in `categorical` are cast once here so per-rerun filters work on codes;
+    any remaining object (Python str) columns become Arrow-backed strings.
+    """
     gdf = gpd.read_parquet(path)
+    # Per-column dtype check: select_dtypes("object") warns under pandas 3's string
+    # migration. Geometry has its own dtype and is never matched; on pandas 3 strings
+    # already load as str, so this only casts genuine object columns.
+    object_cols = [c for c, dtype in gdf.dtypes.items() if pd.api.types.is_object_dtype(dtype)]
+    if object_cols:
+        gdf = gdf.astype({c: STRING_DTYPE for c in object_cols})
+    for col in categorical:
+        if col in gdf.columns:
+            gdf[col] = gdf[col].astype("category")
     return ensure_crs(gdf, epsg)
 
 
+@st.cache_data(show_spinner=True)
+def load_parcel_areas(path: Path, mtime: float) -> pd.DataFrame:
+    """
+    Cached parcel_id / zoning_code / parcel_area_m2 table, one per file version.
+
+    Uses the parcel_area_m2 column written by scripts/05 when present (no geometry
+    decode at all); otherwise projects to EPSG:26914 once here. Geometry is dropped
+    so reruns roll up with pandas only.
+    """
+    columns = parquet_columns(path, ("parcel_id", "zoning_code", "parcel_area_m2"))
+    if "parcel_area_m2" in columns:
+        out = pd.read_parquet(path, columns=columns)
+    else:
+        gdf = gpd.read_parquet(path, columns=columns + ["geometry"])
+        if gdf.crs is None:
+            gdf = gdf.set_crs(WGS84_EPSG)
+        out = pd.DataFrame(gdf.drop(columns=gdf.geometry.name))
+        out["parcel_area_m2"] = shapely.area(np.asarray(ensure_crs(gdf, WORK_CRS_EPSG).geometry.values))
+    if "zoning_code" in out.columns:
+        # Per-rerun codes_isin() then matches categories, not every parcel's string
+        out["zoning_code"] = out["zoning_code"].astype("category")
+    return out
+
+
+@st.cache_data(show_spinner=False)
+def parcel_ids_unique(path: Path, mtime: float) -> bool:
+    """
+    True if no non-null parcel_id repeats in the file (the expected 1-to-1 invariant),
+    checked once per file version from the one column. `mtime` is part of the cache key.
+    """
+    ids = pq.read_table(path, columns=["parcel_id"]).column("parcel_id")
+    return pc.count_distinct(ids, mode="only_valid").as_py() == len(ids) - ids.null_count
+
+
+@st.cache_data(show_spinner=False)
+def load_jurisdictions(path: Path, mtime: float) -> Optional[list[int]]:
+    """
+    Sorted jurisdiction ids for the sidebar, read from the one column (no geometry decode).
+    None if the file has no jurisdiction column. `mtime` is part of the cache key.
+    """
+    if not parquet_columns(path, ("jurisdiction",)):
+        return None
+    values = pd.read_parquet(path, columns=["jurisdiction"])["jurisdiction"].dropna().unique()
+    return np.sort(np.asarray(values, dtype=np.int64)).tolist()
+
+
 def must_exist(path: Path, build_hint: str) -> None:
     if not path.exists():
         st.error(f"Missing {path}. {build_hint}")
@@ -46,6 +152,17 @@ def must_exist(path: Path, build_hint: str) -> None:
 # -------------------------------------------------------------------
 # Domain helpers
 # -------------------------------------------------------------------
+def codes_isin(values: pd.Series, allowed: pd.Index) -> np.ndarray:
+    """
+    Boolean mask of `values` in `allowed`. For categoricals, only the categories are
+    matched and the mask is a gather over the integer codes (missing code -1 -> False).
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return values.isin(allowed).to_numpy()
+    hit = np.append(values.cat.categories.isin(allowed), False)
+    return hit[values.cat.codes.to_numpy()]
+
+
 def view_state_from_bounds(gdf: gpd.GeoDataFrame) -> pdk.ViewState:
     minx, miny, maxx, maxy = gdf.total_bounds
     return pdk.ViewState(
@@ -61,8 +178,12 @@ def add_fill_color(map_gdf: gpd.GeoDataFrame, *, metric_col: str) -> gpd.GeoData
     Color polygons by selected metric using quantile bins (robust to skew/outliers).
     Expects metric_col to be numeric and in display units (e.g., percent already * 100).
     """
-    out = map_gdf.copy()
-    vals = pd.to_numeric(out.get(metric_col, 0), errors="coerce").fillna(0.0)
+    out = map_gdf.copy(deep=False)  # Copy-on-Write: new columns never touch map_gdf
+    vals = out.get(metric_col, 0)
+    if isinstance(vals, pd.Series) and pd.api.types.is_numeric_dtype(vals.dtype):
+        vals = vals.astype("float64").fillna(0.0)
+    else:
+        vals = pd.to_numeric(vals, errors="coerce").fillna(0.0)
 
     if out.empty:
         out["fill_color"] = []
@@ -73,28 +194,25 @@ def add_fill_color(map_gdf: gpd.GeoDataFrame, *, metric_col: str) -> gpd.GeoData
         out["fill_color"] = [[120, 120, 120, 180]] * len(out)
         return out
 
-    # Quantile binning (0..5). duplicates="drop" avoids errors when many ties.
-    bins = pd.qcut(vals.rank(method="average"), q=6, labels=False, duplicates="drop")
-    bins = bins.fillna(0).astype(int)
-
-    # 6-step ramp. Light -> Dark.
-    palette = [
-        [247, 252, 245, 200],
-        [199, 233, 192, 200],
-        [116, 196, 118, 200],
-        [49, 163, 84, 200],
-        [0, 109, 44, 200],
-        [0, 68, 27, 200],
-    ]
+    # Quantile binning (0..5) of the ranks, as pd.qcut(..., duplicates="drop") would:
+    # unique edges, right-closed bins, lowest edge included.
+    ranks = vals.rank(method="average").to_numpy()
+    edges = np.unique(np.quantile(ranks, np.linspace(0, 1, 7)))
+    bins = np.maximum(np.searchsorted(edges, ranks, side="left") - 1, 0)
 
-    out["fill_color"] = bins.apply(lambda b: palette[min(int(b), len(palette) - 1)])
+    # One np.take gather over the (6, 4) palette; lists only at the pydeck boundary
+    out["fill_color"] = FILL_PALETTE.take(np.clip(bins, 0, len(FILL_PALETTE) - 1), axis=0).tolist()
     return out
 
 
-def parse_jurisdiction_labels() -> dict[int, str]:
+@lru_cache(maxsize=1)
+def parse_jurisdiction_labels() -> Mapping[int, str]:
     """
     Parse JURISDICTION_LABELS from env.
     Format: 10:Bellevue,20:Papillion,...
+
+    The env is static per process, so this is parsed once; the cached mapping is
+    returned read-only.
     """
     raw = os.getenv("JURISDICTION_LABELS", "")
     mapping: dict[int, str] = {}
@@ -107,36 +225,40 @@ def parse_jurisdiction_labels() -> dict[int, str]:
             mapping[int(k)] = v.strip()
         except ValueError:
             continue
-    return mapping
+    return MappingProxyType(mapping)
 
 
 def dissolve_zoning_by_code(zoning_filtered: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     """
     Dissolve zoning polygons by zoning_code within the filtered set.
-    Uses shared repair_geometry() to avoid TopologyExceptions.
+    Uses shared repair_geometry() to avoid TopologyExceptions. The result is in WGS84
+    and carries zoning_area_m2, measured in EPSG:26914 before reprojection.
     """
-    z = zoning_filtered.copy()
-
-    if "zoning_code" not in z.columns:
+    if "zoning_code" not in zoning_filtered.columns:
         raise ValueError("Expected 'zoning_code' in zoning.parquet (produced by scripts/02_build_processed.py).")
 
-    z["zoning_label"] = z["zoning_code"].astype(str)
-
-    keep = ["zoning_label", "geometry"]
-    if "zoning_desc" in z.columns:
-        keep.append("zoning_desc")
-    z = z[keep].copy()
-
-    z = ensure_crs(z, WGS84_EPSG)
+    z = zoning_filtered.assign(zoning_label=zoning_filtered["zoning_code"].astype(str))
 
     desc_lookup = None
     if "zoning_desc" in z.columns:
         desc_lookup = z[["zoning_label", "zoning_desc"]].dropna().drop_duplicates("zoning_label")
 
-    z_work = z.to_crs(WORK_CRS_EPSG)
+    # zoning_desc is merged back after the dissolve, so it is not carried through it.
+    # geom_is_valid is dropped too: 02 computed it in WGS84, and validity must be
+    # re-tested after projecting to the work CRS.
+    z = z[["zoning_label", "geometry"]]
+
+    if z.crs is None:
+        z = z.set_crs(WGS84_EPSG)
+
+    # No-op when the caller already passes zoning in WORK_CRS_EPSG; only the small
+    # dissolved result is projected back to WGS84 below.
+    z_work = ensure_crs(z, WORK_CRS_EPSG)
     z_work = repair_geometry(z_work)
 
-    dissolved = z_work[["zoning_label", "geometry"]].dissolve(by="zoning_label", as_index=False)
+    dissolved = dissolve_by(z_work, "zoning_label")
+    # Area while still projected, so compute_zoning_area_shares need not reproject back
+    dissolved["zoning_area_m2"] = shapely.area(np.asarray(dissolved.geometry.values))
     dissolved = dissolved.to_crs(WGS84_EPSG)
 
     if desc_lookup is not None:
@@ -145,59 +267,188 @@ def dissolve_zoning_by_code(zoning_filtered: gpd.GeoDataFrame) -> gpd.GeoDataFra
     return dissolved
 
 
-def compute_rollups(parcels_filtered: gpd.GeoDataFrame) -> pd.DataFrame:
+@st.cache_data(show_spinner="Dissolving zoning...", max_entries=SELECTION_CACHE_ENTRIES)
+def dissolve_zoning_for_jurisdictions(
+    jurisdictions: Optional[tuple[int, ...]],
+    zoning_mtime: float,
+) -> gpd.GeoDataFrame:
+    """
+    Cached dissolve_zoning_by_code() for one jurisdiction selection.
+
+    The sorted jurisdiction tuple and zoning.parquet mtime are the cache key, so reruns
+    triggered by unrelated widgets (or a previously seen selection) skip the dissolve.
+    Zoning comes from a cached WORK_CRS_EPSG copy, projected once per file version.
+    """
+    z = load_gdf_parquet(ZONING_RAW_PATH, zoning_mtime, epsg=WORK_CRS_EPSG)
+    if jurisdictions is not None:
+        z = z[z["jurisdiction"].isin(jurisdictions)]
+    return dissolve_zoning_by_code(z)
+
+
+@st.cache_data(show_spinner=False, max_entries=SELECTION_CACHE_ENTRIES)
+def map_polygons_by_label(
+    jurisdictions: Optional[tuple[int, ...]],
+    zoning_mtime: float,
+) -> dict[str, list[list[list[list[float]]]]]:
+    """
+    Simplified dissolved zoning geometry for the map as PolygonLayer rings, by zoning_label.
+
+    Each label maps to its polygons (multipolygons split into parts), each a list of
+    rings (exterior first, then holes) of [lon, lat] pairs. Coordinates come out of one
+    shapely.get_coordinates pass, rounded to MAP_COORD_DECIMALS to keep the deck spec small.
+
+    Same cache key as dissolve_zoning_for_jurisdictions(), so metric and layer changes
+    only rebuild per-row properties; metrics keep using the full-resolution dissolve.
+    """
+    diss = dissolve_zoning_for_jurisdictions(jurisdictions, zoning_mtime)
+    simplified = shapely.simplify(
+        np.asarray(diss.geometry.values),
+        tolerance=MAP_SIMPLIFY_TOLERANCE_DEG,
+        preserve_topology=True,
+    )
+    parts, part_label = shapely.get_parts(simplified, return_index=True)
+    rings, ring_part = shapely.get_rings(parts, return_index=True)
+    coords = np.round(shapely.get_coordinates(rings), MAP_COORD_DECIMALS)
+    ring_coords = np.split(coords, np.cumsum(shapely.get_num_coordinates(rings))[:-1])
+
+    polygons: list[list[list[list[float]]]] = [[] for _ in range(len(parts))]
+    for part, ring in zip(ring_part.tolist(), ring_coords):
+        polygons[part].append(ring.tolist())
+
+    labels = diss["zoning_label"].astype(str).to_numpy()
+    out: dict[str, list[list[list[list[float]]]]] = {}
+    for label_idx, polygon in zip(part_label.tolist(), polygons):
+        out.setdefault(labels[label_idx], []).append(polygon)
+    return out
+
+
+def compute_rollups(parcel_areas: pd.DataFrame, *, unique_parcel_ids: bool = False) -> pd.DataFrame:
     """
     Roll up unique parcel counts + parcel area metrics by zoning_code.
-    Parcel areas are computed in EPSG:26914 for accurate area calculations.
+    Takes rows of load_parcel_areas(), whose areas are already in EPSG:26914.
+
+    parcels_with_zoning_1to1.parquet holds one row per parcel; pass unique_parcel_ids=True
+    when parcel_ids_unique() confirms it, and parcel counts become plain per-group counts.
     """
-    required = {"parcel_id", "zoning_code", "geometry"}
-    missing = required - set(parcels_filtered.columns)
+    required = {"parcel_id", "zoning_code", "parcel_area_m2"}
+    missing = required - set(parcel_areas.columns)
     if missing:
         raise ValueError(f"Parcels missing required columns: {sorted(missing)}")
 
-    df = parcels_filtered.dropna(subset=["zoning_code"]).copy()
+    df_area = parcel_areas.dropna(subset=["zoning_code"])
 
-    df_area = df.to_crs(WORK_CRS_EPSG)
-    df_area["parcel_area_m2"] = df_area.geometry.area
+    # Group on the (categorical) code column itself: no per-row str labels, and
+    # observed=True skips categories the current filter removed.
+    grp = df_area.groupby("zoning_code", observed=True)
+    out = grp.agg(
+        total_parcel_area_m2=("parcel_area_m2", "sum"),
+        median_parcel_area_m2=("parcel_area_m2", "median"),
+    )
 
-    grp = df_area.groupby(df_area["zoning_code"].astype(str), dropna=False)
+    if unique_parcel_ids:
+        # Each parcel appears once, so the distinct count is the non-null count
+        out["parcel_count"] = grp["parcel_id"].count()
+    else:
+        # Distinct (code, parcel) pairs + size() instead of a per-group nunique
+        out["parcel_count"] = (
+            df_area[["zoning_code", "parcel_id"]]
+            .dropna(subset=["parcel_id"])
+            .drop_duplicates()
+            .groupby("zoning_code", observed=True)
+            .size()
+        )
 
-    out = pd.DataFrame(
+    out = out.reset_index()
+    return pd.DataFrame(
         {
-            "zoning_label": grp["zoning_code"].first().astype(str),
-            "parcel_count": grp["parcel_id"].nunique(),
-            "total_parcel_area_acres": grp["parcel_area_m2"].sum() * M2_TO_ACRES,
-            "median_parcel_area_acres": grp["parcel_area_m2"].median() * M2_TO_ACRES,
+            "zoning_label": out["zoning_code"].astype(str),
+            "parcel_count": out["parcel_count"].fillna(0).astype(int),
+            "total_parcel_area_acres": (out["total_parcel_area_m2"] * M2_TO_ACRES).astype(float),
+            "median_parcel_area_acres": (out["median_parcel_area_m2"] * M2_TO_ACRES).astype(float),
         }
-    ).reset_index(drop=True)
-
-    out["parcel_count"] = out["parcel_count"].astype(int)
-    out["total_parcel_area_acres"] = out["total_parcel_area_acres"].astype(float)
-    out["median_parcel_area_acres"] = out["median_parcel_area_acres"].astype(float)
-
-    return out
+    )
 
 
 def compute_zoning_area_shares(zoning_dissolved: gpd.GeoDataFrame) -> pd.DataFrame:
     """
     Compute zoning polygon area (acres) and share of jurisdiction land area
     using dissolved zoning polygons (already filtered by jurisdiction).
+    Pure arithmetic on the zoning_area_m2 column from dissolve_zoning_by_code().
     """
     if zoning_dissolved.empty:
         return pd.DataFrame(columns=["zoning_label", "zoning_area_acres", "pct_jurisdiction_land_area"])
 
-    if "zoning_label" not in zoning_dissolved.columns:
-        raise ValueError("Expected 'zoning_label' on dissolved zoning GeoDataFrame.")
+    missing = {"zoning_label", "zoning_area_m2"} - set(zoning_dissolved.columns)
+    if missing:
+        raise ValueError(f"Dissolved zoning GeoDataFrame missing required columns: {sorted(missing)}")
 
-    z = zoning_dissolved.copy()
-    z_area = z.to_crs(WORK_CRS_EPSG)
-    z_area["zoning_area_m2"] = z_area.geometry.area
+    z_area = pd.DataFrame(zoning_dissolved[["zoning_label", "zoning_area_m2"]])
     z_area["zoning_area_acres"] = z_area["zoning_area_m2"] * M2_TO_ACRES
 
     total_acres = float(z_area["zoning_area_acres"].sum() or 0.0)
     z_area["pct_jurisdiction_land_area"] = (z_area["zoning_area_acres"] / total_acres) if total_acres > 0 else 0.0
 
-    return z_area[["zoning_label", "zoning_area_acres", "pct_jurisdiction_land_area"]].copy()
+    return z_area[["zoning_label", "zoning_area_acres", "pct_jurisdiction_land_area"]]
+
+
+@st.cache_data(show_spinner=False, max_entries=SELECTION_CACHE_ENTRIES)
+def build_map_table(
+    jurisdictions: Optional[tuple[int, ...]],
+    parcels_mtime: float,
+    zoning_mtime: float,
+) -> tuple[gpd.GeoDataFrame, int]:
+    """
+    Dissolved zoning polygons for the selected jurisdictions with parcel rollups,
+    area shares and density ratios attached, plus the number of zoning codes with parcels.
+
+    Everything here depends only on the selection and file versions, not on the chosen
+    metric; main() adds the metric column and colors on top of a cached copy.
+    """
+    zoning_f = load_gdf_parquet(ZONING_RAW_PATH, zoning_mtime, epsg=WGS84_EPSG)
+    if jurisdictions is not None:
+        zoning_f = zoning_f[zoning_f["jurisdiction"].isin(jurisdictions)]
+    allowed_codes = pd.Index(zoning_f["zoning_code"].dropna().unique()).astype(str)
+
+    # Cached areas; no reprojection per selection
+    parcel_areas = load_parcel_areas(PARCELS_PATH, parcels_mtime)
+    rollups = compute_rollups(
+        parcel_areas[codes_isin(parcel_areas["zoning_code"], allowed_codes)],
+        unique_parcel_ids=parcel_ids_unique(PARCELS_PATH, parcels_mtime),
+    )
+
+    zoning_diss = dissolve_zoning_for_jurisdictions(jurisdictions, zoning_mtime)
+    zoning_diss["zoning_label"] = zoning_diss["zoning_label"].astype(str)
+
+    # Merge attributes without the geometry column, then reattach it by position: a
+    # many-to-one left merge keeps the left rows in order.
+    zoning_area = compute_zoning_area_shares(zoning_diss)
+    attrs = (
+        pd.DataFrame(zoning_diss.drop(columns=[zoning_diss.geometry.name, "zoning_area_m2"]))
+        .merge(rollups, on="zoning_label", how="left", validate="many_to_one")
+        .merge(zoning_area, on="zoning_label", how="left", validate="many_to_one")
+    )
+    map_gdf = gpd.GeoDataFrame(attrs, geometry=zoning_diss.geometry.to_numpy(), crs=zoning_diss.crs)
+
+    map_gdf["parcel_count"] = map_gdf["parcel_count"].fillna(0).astype(int)
+    for c in (
+        "total_parcel_area_acres",
+        "median_parcel_area_acres",
+        "zoning_area_acres",
+        "pct_jurisdiction_land_area",
+    ):
+        if c in map_gdf.columns:
+            map_gdf[c] = map_gdf[c].fillna(0.0).astype(float)
+
+    # NaN (not pd.NA) keeps the ratios float64 instead of object dtype
+    denom = map_gdf["zoning_area_acres"].replace(0.0, np.nan)
+
+    # parcels per zoning acre (density)
+    map_gdf["parcels_per_zoning_acre"] = (map_gdf["parcel_count"] / denom).fillna(0.0)
+
+    # parcel acres per zoning acre (intensity proxy)
+    map_gdf["parcel_acres_per_zoning_acre"] = (map_gdf["total_parcel_area_acres"] / denom).fillna(0.0)
+
+    return map_gdf, int(rollups["zoning_label"].nunique())
 
 
 def compute_zoning_area_by_jurisdiction(zoning_filtered: gpd.GeoDataFrame) -> pd.DataFrame:
@@ -213,12 +464,12 @@ def compute_zoning_area_by_jurisdiction(zoning_filtered: gpd.GeoDataFrame) -> pd
     if missing:
         raise ValueError(f"Zoning polygons missing required columns: {sorted(missing)}")
 
-    z = zoning_filtered.dropna(subset=["jurisdiction", "zoning_code"]).copy()
+    z = zoning_filtered.dropna(subset=["jurisdiction", "zoning_code"])
     if z.empty:
         return pd.DataFrame(columns=["jurisdiction", "zoning_label", "zoning_area_acres"])
 
-    z_area = z.to_crs(WORK_CRS_EPSG)
-    z_area["area_m2"] = z_area.geometry.area
+    z_area = ensure_crs(z, WORK_CRS_EPSG)
+    z_area["area_m2"] = shapely.area(np.asarray(z_area.geometry.values))
     z_area["area_acres"] = z_area["area_m2"] * M2_TO_ACRES
 
     out = (
@@ -230,38 +481,42 @@ def compute_zoning_area_by_jurisdiction(zoning_filtered: gpd.GeoDataFrame) -> pd
     return out
 
 
-@st.cache_data(show_spinner=True)
-def assign_parcel_jurisdiction(
-    _parcels: gpd.GeoDataFrame,
-    _zoning_raw: gpd.GeoDataFrame,
-    parcels_mtime: float,
-    zoning_mtime: float,
-) -> gpd.GeoDataFrame:
+@st.cache_data(show_spinner=False)
+def zoning_area_by_jurisdiction(zoning_mtime: float) -> pd.DataFrame:
+    """
+    compute_zoning_area_by_jurisdiction() over every jurisdiction, once per zoning.parquet
+    version; the Comparison tab filters this small table instead of re-projecting.
     """
-    Ensure _parcels have a 'jurisdiction' column.
+    z = load_gdf_parquet(ZONING_RAW_PATH, zoning_mtime, epsg=WORK_CRS_EPSG)
+    return compute_zoning_area_by_jurisdiction(z)
 
-    - If _parcels already include 'jurisdiction', returns a copy.
-    - Otherwise, performs a spatial join against zoning polygons to infer jurisdiction.
 
-    This is cached because the join can be expensive on large datasets.
+@st.cache_data(show_spinner=True)
+def parcel_jurisdiction_lookup(parcels_mtime: float, zoning_mtime: float) -> pd.DataFrame:
     """
-    if "jurisdiction" in _parcels.columns:
-        return _parcels.copy()
-
-    required = {"parcel_id", "geometry"}
-    missing = required - set(_parcels.columns)
-    if missing:
-        raise ValueError(f"Parcels missing required columns for jurisdiction assignment: {sorted(missing)}")
+    Infer each parcel's jurisdiction by spatial join against zoning polygons.
 
-    if "jurisdiction" not in _zoning_raw.columns:
+    Returns a small parcel_id -> jurisdiction table (no geometry) built from the full
+    parcels and zoning files, so the cache entry is cheap and valid for any filter;
+    callers merge it onto their own parcel subset. File mtimes are the cache key.
+    """
+    if not parquet_columns(ZONING_RAW_PATH, ("jurisdiction",)):
         raise ValueError("Cannot infer parcel jurisdiction: zoning.parquet has no 'jurisdiction' field.")
+    if not parquet_columns(PARCELS_PATH, ("parcel_id",)):
+        raise ValueError("Parcels missing required columns for jurisdiction assignment: ['parcel_id']")
 
     # Work in projected CRS for robust spatial ops
-    p = ensure_crs(_parcels, WGS84_EPSG).to_crs(WORK_CRS_EPSG)[["parcel_id", "geometry"]].copy()
-    z = ensure_crs(_zoning_raw, WGS84_EPSG).to_crs(WORK_CRS_EPSG)[["jurisdiction", "geometry"]].copy()
+    p = gpd.read_parquet(PARCELS_PATH, columns=["parcel_id", "geometry"])
+    z = gpd.read_parquet(
+        ZONING_RAW_PATH,
+        columns=parquet_columns(ZONING_RAW_PATH, ("jurisdiction", "geometry")),
+    )
+    p = ensure_crs(ensure_crs(p, WGS84_EPSG), WORK_CRS_EPSG)
+    z = ensure_crs(ensure_crs(z, WGS84_EPSG), WORK_CRS_EPSG)
 
-    # Repair zoning geometry to avoid topology errors during sjoin
-    z = repair_geometry(z)
+    # Repair zoning geometry to avoid topology errors during sjoin. Validity is tested
+    # in the work CRS; 02's geom_is_valid (computed in WGS84) is not read.
+    z = repair_geometry(z)[["jurisdiction", "geometry"]]
 
     try:
         joined = gpd.sjoin(p, z, how="left", predicate="intersects")
@@ -270,15 +525,28 @@ def assign_parcel_jurisdiction(
         joined = gpd.sjoin(p, z, how="left", op="intersects")
 
     # If a parcel hits multiple zoning polys (rare), keep the first non-null jurisdiction.
-    j = (
+    return (
         joined.dropna(subset=["jurisdiction"])
         .groupby("parcel_id", as_index=False)["jurisdiction"]
         .first()
     )
 
-    out = _parcels.copy()
-    out = out.merge(j, on="parcel_id", how="left")
-    return out
+
+def assign_parcel_jurisdiction(parcels: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    Ensure parcels have a 'jurisdiction' column, merging the cached lookup if needed.
+    """
+    if "jurisdiction" in parcels.columns:
+        return parcels
+    if "parcel_id" not in parcels.columns:
+        raise ValueError("Parcels missing required columns for jurisdiction assignment: ['parcel_id']")
+
+    lookup = parcel_jurisdiction_lookup(
+        float(PARCELS_PATH.stat().st_mtime),
+        float(ZONING_RAW_PATH.stat().st_mtime),
+    )
+    return parcels.merge(lookup, on="parcel_id", how="left")
+
 
 def build_tooltip(has_desc: bool, *, metric_short_label: str, metric_unit: str) -> dict[str, Any]:
     unit_suffix = "%" if metric_unit == "percent" else (" acres" if metric_unit == "acres" else "")
@@ -319,18 +587,14 @@ def make_safe_filename(s: str) -> str:
     return "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in s).strip("_")
 
 
-def _format_jurisdiction(j: int, labels: dict[int, str]) -> str:
+def _format_jurisdiction(j: int, labels: Mapping[int, str]) -> str:
     return labels.get(int(j), f"Jurisdiction {int(j)}")
 
 
-def _maybe_import_altair():
-    try:
-        import altair as alt  # type: ignore
-
-        return alt
-    except Exception:
-        return None
-
+def _jurisdiction_labels(jurisdictions: pd.Series, labels: Mapping[int, str]) -> pd.Series:
+    """Display label per row: formats each distinct id once, then maps the column."""
+    ids = jurisdictions.astype(int)
+    return ids.map({j: _format_jurisdiction(j, labels) for j in ids.unique()})
 
 
 # -------------------------------------------------------------------
@@ -344,19 +608,15 @@ def compute_data_quality(parcels_all: gpd.GeoDataFrame, zoning_raw: gpd.GeoDataF
     - Coverage is measured as share of parcels with non-null zoning_code.
     - If parcels have no jurisdiction column, jurisdiction is inferred via zoning polygons (cached).
     """
-    parcels_mtime = float(PARCELS_PATH.stat().st_mtime)
-    zoning_mtime = float(ZONING_RAW_PATH.stat().st_mtime)
-
     # Ensure jurisdiction exists on parcels for breakdowns
-    parcels_j = assign_parcel_jurisdiction(
-        parcels_all,
-        zoning_raw,
-        parcels_mtime=parcels_mtime,
-        zoning_mtime=zoning_mtime,
-    ) if ("jurisdiction" not in parcels_all.columns and "jurisdiction" in zoning_raw.columns) else parcels_all.copy()
+    parcels_j = (
+        assign_parcel_jurisdiction(parcels_all)
+        if ("jurisdiction" not in parcels_all.columns and "jurisdiction" in zoning_raw.columns)
+        else parcels_all
+    )
 
     if selected_jurisdictions is not None and "jurisdiction" in parcels_j.columns:
-        parcels_j = parcels_j[parcels_j["jurisdiction"].isin(selected_jurisdictions)].copy()
+        parcels_j = parcels_j[parcels_j["jurisdiction"].isin(selected_jurisdictions)]
 
     # Basic counts
     parcel_id_col = "parcel_id" if "parcel_id" in parcels_j.columns else None
@@ -376,9 +636,9 @@ def compute_data_quality(parcels_all: gpd.GeoDataFrame, zoning_raw: gpd.GeoDataF
         n_invalid = 0
 
     # Zoning polygon stats (within jurisdiction filter)
-    z = zoning_raw.copy()
+    z = zoning_raw
     if selected_jurisdictions is not None and "jurisdiction" in z.columns:
-        z = z[z["jurisdiction"].isin(selected_jurisdictions)].copy()
+        z = z[z["jurisdiction"].isin(selected_jurisdictions)]
 
     n_zoning_polys = int(len(z))
     n_zoning_codes = int(z["zoning_code"].astype(str).nunique()) if "zoning_code" in z.columns else 0
@@ -387,12 +647,19 @@ def compute_data_quality(parcels_all: gpd.GeoDataFrame, zoning_raw: gpd.GeoDataF
     # Breakdown table by jurisdiction (if available)
     by_jur = pd.DataFrame()
     if "jurisdiction" in parcels_j.columns:
-        g = parcels_j.groupby(parcels_j["jurisdiction"].astype(int), dropna=False)
+        jur = parcels_j["jurisdiction"].astype(int)
+        g = parcels_j.groupby(jur, dropna=False)
+        if parcel_id_col:
+            # Distinct (jurisdiction, parcel) pairs + size() instead of a per-group nunique
+            ids = pd.DataFrame({"jurisdiction": jur, "parcel_id": parcels_j[parcel_id_col]}).dropna().drop_duplicates()
+            n_by_jur = ids.groupby("jurisdiction").size().reindex(g.size().index, fill_value=0)
+        else:
+            n_by_jur = g.size()
         by_jur = pd.DataFrame(
             {
                 "jurisdiction": g["jurisdiction"].first().astype(int),
-                "parcels": g[parcel_id_col].nunique() if parcel_id_col else g.size(),
-                "parcels_w_zoning": g["zoning_code"].apply(lambda s: int(s.notna().sum())) if "zoning_code" in parcels_j.columns else 0,
+                "parcels": n_by_jur,
+                "parcels_w_zoning": g["zoning_code"].count() if "zoning_code" in parcels_j.columns else 0,
             }
         ).reset_index(drop=True)
         by_jur["pct_w_zoning"] = (by_jur["parcels_w_zoning"] / by_jur["parcels"]).fillna(0.0)
@@ -415,6 +682,11 @@ def compute_data_quality(parcels_all: gpd.GeoDataFrame, zoning_raw: gpd.GeoDataF
 def main() -> None:
     configure_logging()
 
+    # Filter results below are used as views, not defensively copied; Copy-on-Write
+    # keeps that safe. It is always on from pandas 3.
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+
     st.set_page_config(page_title="Sarpy County Zoning Dashboard", layout="wide")
     st.title("Sarpy County Zoning Dashboard")
     st.caption(
@@ -432,8 +704,9 @@ def main() -> None:
         "Build it with scripts/02_build_processed.py.",
     )
 
-    parcels = load_gdf_parquet(PARCELS_PATH, PARCELS_PATH.stat().st_mtime, epsg=WGS84_EPSG)
-    zoning_raw = load_gdf_parquet(ZONING_RAW_PATH, ZONING_RAW_PATH.stat().st_mtime, epsg=WGS84_EPSG)
+    # One stat per file per rerun: every cache key below sees the same file versions
+    parcels_mtime = PARCELS_PATH.stat().st_mtime
+    zoning_mtime = ZONING_RAW_PATH.stat().st_mtime
 
     # Sidebar filters
     st.sidebar.header("Filters")
@@ -458,13 +731,13 @@ def main() -> None:
     metric_col, metric_short_label, metric_unit = metric_options[metric_label]
 
     selected_jurisdictions: Optional[list[int]] = None
-    labels: dict[int, str] = {}
+    labels: Mapping[int, str] = {}
 
-    if "jurisdiction" not in zoning_raw.columns:
+    jvals = load_jurisdictions(ZONING_RAW_PATH, zoning_mtime)
+    if jvals is None:
         st.sidebar.warning("No 'jurisdiction' field found in zoning.parquet; jurisdiction filter disabled.")
     else:
         labels = parse_jurisdiction_labels()
-        jvals = sorted([int(x) for x in zoning_raw["jurisdiction"].dropna().unique()])
 
         selected_jurisdictions = st.sidebar.multiselect(
             "Jurisdictions",
@@ -485,64 +758,50 @@ def main() -> None:
     show_zoning_outline = st.sidebar.checkbox("Zoning outlines", value=True)
     show_zoning_labels = st.sidebar.checkbox("Zoning labels", value=False)
 
+    # Geometry reads come after the sidebar so it renders without waiting on them
+    parcels = load_gdf_parquet(
+        PARCELS_PATH,
+        parcels_mtime,
+        epsg=WGS84_EPSG,
+        categorical=("zoning_code",),
+    )
+    zoning_raw = load_gdf_parquet(ZONING_RAW_PATH, zoning_mtime, epsg=WGS84_EPSG)
+
     # Apply zoning filter
     zoning_f = zoning_raw
     if selected_jurisdictions is not None:
-        zoning_f = zoning_f[zoning_f["jurisdiction"].isin(selected_jurisdictions)].copy()
-
-    # Dissolve filtered zoning (map layer)
-    try:
-        zoning_diss = dissolve_zoning_by_code(zoning_f)
-    except Exception as exc:
-        LOGGER.exception("Failed to dissolve zoning polygons")
-        st.error(f"Failed to dissolve zoning polygons: {exc}")
-        st.stop()
+        zoning_f = zoning_f[zoning_f["jurisdiction"].isin(selected_jurisdictions)]
 
     # Filter parcels to codes present in filtered zoning set
     if "zoning_code" not in parcels.columns:
         st.error("Expected 'zoning_code' in parcels_with_zoning_1to1.parquet")
         st.stop()
 
-    allowed_codes = set(zoning_f["zoning_code"].dropna().astype(str).unique())
-    parcels_f = parcels[parcels["zoning_code"].astype(str).isin(allowed_codes)].copy()
-
-    # Rollups + merge into dissolved polygons
-    rollups = compute_rollups(parcels_f)
-    zoning_diss["zoning_label"] = zoning_diss["zoning_label"].astype(str)
-
-    map_gdf = zoning_diss.merge(rollups, on="zoning_label", how="left")
-
-    zoning_area = compute_zoning_area_shares(zoning_diss)
-    map_gdf = map_gdf.merge(zoning_area, on="zoning_label", how="left")
-
-    map_gdf["parcel_count"] = map_gdf["parcel_count"].fillna(0).astype(int)
-    for c in (
-        "total_parcel_area_acres",
-        "median_parcel_area_acres",
-        "zoning_area_acres",
-        "pct_jurisdiction_land_area",
-    ):
-        if c in map_gdf.columns:
-            map_gdf[c] = map_gdf[c].fillna(0.0).astype(float)
+    # Semi-join against the (few) distinct codes via the categorical codes; a merge
+    # would copy every parcel column, geometry included.
+    allowed_codes = pd.Index(zoning_f["zoning_code"].dropna().unique()).astype(str)
+    parcels_f = parcels[codes_isin(parcels["zoning_code"], allowed_codes)]
 
-    denom = map_gdf["zoning_area_acres"].replace(0.0, pd.NA)
-
-    # parcels per zoning acre (density)
-    map_gdf["parcels_per_zoning_acre"] = (map_gdf["parcel_count"] / denom).fillna(0.0)
-
-    # parcel acres per zoning acre (intensity proxy)
-    map_gdf["parcel_acres_per_zoning_acre"] = (map_gdf["total_parcel_area_acres"] / denom).fillna(0.0)
+    # Dissolve filtered zoning and merge in the rollups; cached per (selection, file
+    # versions), so metric and layer changes only redo the metric column below
+    jurisdiction_key = tuple(sorted(selected_jurisdictions)) if selected_jurisdictions is not None else None
+    try:
+        map_gdf, unique_zones = build_map_table(jurisdiction_key, parcels_mtime, zoning_mtime)
+    except Exception as exc:
+        LOGGER.exception("Failed to dissolve zoning polygons")
+        st.error(f"Failed to dissolve zoning polygons: {exc}")
+        st.stop()
 
     # Ensure choropleth metric is in display units
     if metric_col == "pct_jurisdiction_land_area":
         map_gdf["metric_for_color"] = map_gdf["pct_jurisdiction_land_area"] * 100.0
     else:
-        map_gdf["metric_for_color"] = pd.to_numeric(map_gdf.get(metric_col, 0), errors="coerce").fillna(0.0)
+        # Every metric column is built numeric and NaN-free above
+        map_gdf["metric_for_color"] = map_gdf[metric_col]
 
     # KPIs (single 4-column row)
     total_parcels = int(parcels_f["parcel_id"].nunique()) if "parcel_id" in parcels_f.columns else len(parcels_f)
     matched_parcels = int(parcels_f["zoning_code"].notna().sum())
-    unique_zones = int(rollups["zoning_label"].nunique())
     total_jur_acres = float(map_gdf["zoning_area_acres"].sum() or 0.0)
 
     # -------------------------------------------------------------------
@@ -572,7 +831,7 @@ def main() -> None:
             st.subheader("Top Zoning Codes")
 
             # Start from the full non-geometry table
-            table_df = map_gdf.drop(columns="geometry", errors="ignore").copy()
+            table_df = map_gdf.drop(columns="geometry", errors="ignore")
 
             # Display percent
             table_df["pct_jurisdiction_land_area_pct"] = (table_df["pct_jurisdiction_land_area"] * 100).round(2)
@@ -603,14 +862,14 @@ def main() -> None:
                 sort_col = "pct_jurisdiction_land_area_pct"
 
             st.dataframe(
-                table_df[cols].sort_values(sort_col, ascending=False).head(25).reset_index(drop=True),
+                table_df[cols].nlargest(25, sort_col).reset_index(drop=True),
                 use_container_width=True,
                 height=700,
             )
 
             st.subheader("Exports")
 
-            export_rollups = table_df[cols].copy()
+            export_rollups = table_df[cols]
 
             parcel_cols = ["parcel_id", "zoning_code"]
             if "zoning_desc" in parcels_f.columns:
@@ -618,7 +877,7 @@ def main() -> None:
             if "jurisdiction" in parcels_f.columns:
                 parcel_cols.append("jurisdiction")
 
-            export_parcels = parcels_f.drop(columns="geometry", errors="ignore")[parcel_cols].copy()
+            export_parcels = parcels_f[parcel_cols]
             export_parcels["zoning_code"] = export_parcels["zoning_code"].astype(str)
 
             rollups_name = make_safe_filename(metric_label.lower())
@@ -663,42 +922,54 @@ def main() -> None:
             map_gdf_colored["pct_jurisdiction_land_area_pct"] = (map_gdf_colored["pct_jurisdiction_land_area"] * 100).round(2)
 
             map_gdf_colored["metric_value"] = (
-                pd.to_numeric(map_gdf_colored["metric_for_color"], errors="coerce").fillna(0.0).round(2)
+                map_gdf_colored["metric_for_color"].round(2)
             )
 
-            
-            geojson = json.loads(map_gdf_colored.to_json())
+
+            # Simplify only what is sent to the browser; metrics above use full geometry.
+            # One PolygonLayer row per polygon part: flat rings plus per-row properties,
+            # no GeoJSON Feature nesting. The rings are cached with the dissolve and
+            # attached by label; only the properties are rebuilt per rerun.
+            polygons = map_polygons_by_label(jurisdiction_key, zoning_mtime)
+            properties = pd.DataFrame(map_gdf_colored[[c for c in MAP_PROPERTY_COLUMNS if c in map_gdf_colored.columns]])
+            polygon_records = [
+                {**props, "polygon": polygon}
+                for props in properties.astype(object).where(properties.notna(), None).to_dict(orient="records")
+                for polygon in polygons.get(str(props["zoning_label"]), ())
+            ]
 
             layers: list[pdk.Layer] = []
 
             if show_zoning_fill:
                 layers.append(
                     pdk.Layer(
-                        "GeoJsonLayer",
+                        "PolygonLayer",
                         id="zoning-fill",
-                        data=geojson,
+                        data=polygon_records,
                         pickable=True,
                         stroked=False,
                         filled=True,
                         extruded=False,
                         wireframe=False,
                         opacity=0.9,
-                        get_fill_color="properties.fill_color",
+                        get_polygon="polygon",
+                        get_fill_color="fill_color",
                     )
                 )
 
             if show_zoning_outline:
                 layers.append(
                     pdk.Layer(
-                        "GeoJsonLayer",
+                        "PolygonLayer",
                         id="zoning-outline",
-                        data=geojson,
+                        data=polygon_records,
                         pickable=False,
                         stroked=True,
                         filled=False,
                         extruded=False,
                         wireframe=False,
                         opacity=1.0,
+                        get_polygon="polygon",
                         get_line_color=[0, 0, 0, 140],
                         get_line_width=60,
                     )
@@ -706,7 +977,7 @@ def main() -> None:
 
             if show_zoning_labels:
                 # Use polygon centroids for label placement
-                label_df = map_gdf_colored[["zoning_label", "geometry"]].copy()
+                label_df = map_gdf_colored[["zoning_label", "geometry"]]
                 label_df = label_df.to_crs(WGS84_EPSG)
                 cent = label_df.geometry.centroid
                 label_df["lon"] = cent.x
@@ -747,7 +1018,7 @@ def main() -> None:
         with st.expander("Debug"):
             st.write("Selected jurisdictions:", selected_jurisdictions)
             st.write("Zoning polygons (filtered):", len(zoning_f))
-            st.write("Dissolved zoning codes:", len(zoning_diss))
+            st.write("Dissolved zoning codes:", len(map_gdf))
             st.write("Selected metric:", metric_col)
 
             metric_cols = [
@@ -774,8 +1045,7 @@ def main() -> None:
             )
             st.dataframe(
                 map_gdf[["zoning_label", "metric_for_color"]]
-                .sort_values("metric_for_color", ascending=False)
-                .head(10)
+                .nlargest(10, "metric_for_color")
                 .reset_index(drop=True)
             )
 
@@ -830,29 +1100,23 @@ def main() -> None:
         top_n = st.slider("Top N zoning categories", min_value=5, max_value=40, value=15, step=1)
         group_other = st.checkbox("Group the remainder into 'Other'", value=True)
 
-        zoning_compare = zoning_f[zoning_f["jurisdiction"].isin(compare_jurs)].copy()
-
         # Metric: land area (from zoning polygons)
         if metric_choice == "Zoning mix by land area":
-            area_df = compute_zoning_area_by_jurisdiction(zoning_compare)
+            all_areas = zoning_area_by_jurisdiction(zoning_mtime)
+            area_df = all_areas[all_areas["jurisdiction"].isin(compare_jurs)].reset_index(drop=True)
             if area_df.empty:
                 st.warning("No zoning polygons found for the selected jurisdictions.")
                 st.stop()
 
-            area_df["jurisdiction_label"] = area_df["jurisdiction"].apply(lambda j: _format_jurisdiction(int(j), labels))
+            area_df["jurisdiction_label"] = _jurisdiction_labels(area_df["jurisdiction"], labels)
             value_col = "zoning_area_acres"
             units_label = "Acres"
-            mix_df = area_df.rename(columns={"zoning_label": "zoning_label"}).copy()
+            mix_df = area_df
 
         # Metric: parcel count (from parcels; infer jurisdiction if missing)
         else:
             try:
-                parcels_with_j = assign_parcel_jurisdiction(
-                    parcels_f,
-                    zoning_compare,
-                    parcels_mtime=float(PARCELS_PATH.stat().st_mtime),
-                    zoning_mtime=float(ZONING_RAW_PATH.stat().st_mtime),
-                )
+                parcels_with_j = assign_parcel_jurisdiction(parcels_f)
             except Exception as exc:
                 st.error(f"Failed to compute parcel-count comparison: {exc}")
                 st.stop()
@@ -864,33 +1128,44 @@ def main() -> None:
                 )
                 st.stop()
 
-            p = parcels_with_j.dropna(subset=["jurisdiction", "zoning_code"]).copy()
-            p = p[p["jurisdiction"].astype(int).isin([int(x) for x in compare_jurs])].copy()
+            p = parcels_with_j.dropna(subset=["jurisdiction", "zoning_code"])
+            p = p[p["jurisdiction"].astype(int).isin([int(x) for x in compare_jurs])]
 
             if p.empty:
                 st.warning("No parcels found for the selected jurisdictions.")
                 st.stop()
 
+            # Distinct (jurisdiction, code, parcel) triples + size() instead of a per-group
+            # nunique; grouped on the categorical codes, labels cast to str per group only
             mix_df = (
-                p.groupby([p["jurisdiction"].astype(int), p["zoning_code"].astype(str)], dropna=False)["parcel_id"]
-                .nunique()
-                .reset_index()
-                .rename(columns={"zoning_code": "zoning_label", "parcel_id": "parcel_count"})
+                pd.DataFrame(
+                    {
+                        "jurisdiction": p["jurisdiction"].astype(int),
+                        "zoning_label": p["zoning_code"],
+                        "parcel_id": p["parcel_id"],
+                    }
+                )
+                .dropna(subset=["parcel_id"])
+                .drop_duplicates()
+                .groupby(["jurisdiction", "zoning_label"], observed=True)
+                .size()
+                .reset_index(name="parcel_count")
             )
-            mix_df["jurisdiction_label"] = mix_df["jurisdiction"].apply(lambda j: _format_jurisdiction(int(j), labels))
+            mix_df["zoning_label"] = mix_df["zoning_label"].astype(str)
+            mix_df["jurisdiction_label"] = _jurisdiction_labels(mix_df["jurisdiction"], labels)
             value_col = "parcel_count"
             units_label = "Parcels"
 
         # Optionally reduce categories to Top N + Other (for readability)
-        totals_by_zone = mix_df.groupby("zoning_label")[value_col].sum().sort_values(ascending=False)
-        top_zones = set(totals_by_zone.head(top_n).index)
+        totals_by_zone = mix_df.groupby("zoning_label")[value_col].sum()
+        top_zones = set(totals_by_zone.nlargest(top_n).index)
 
         if group_other:
             mix_df["zoning_group"] = mix_df["zoning_label"].where(mix_df["zoning_label"].isin(top_zones), "Other")
         else:
             mix_df["zoning_group"] = mix_df["zoning_label"].where(mix_df["zoning_label"].isin(top_zones))
 
-        mix_df = mix_df.dropna(subset=["zoning_group"]).copy()
+        mix_df = mix_df.dropna(subset=["zoning_group"])
 
         plot_df = (
             mix_df.groupby(["jurisdiction_label", "zoning_group"], as_index=False)[value_col]
@@ -904,7 +1179,7 @@ def main() -> None:
 
         # Table (always)
         st.markdown("### Data")
-        show_df = plot_df.copy()
+        show_df = plot_df.copy(deep=False)  # rounded for display; the chart keeps plot_df
         show_df[value_col] = show_df[value_col].round(2)
         show_df["share_pct"] = (show_df["share"] * 100).round(2)
         st.dataframe(
@@ -914,33 +1189,37 @@ def main() -> None:
         )
 
         st.markdown("### Chart")
-        alt = _maybe_import_altair()
-        if alt is None:
-            st.info("Altair is not available in this environment. Showing table only.")
-        else:
-            y_field = "share" if display_choice == "Percent share" else value_col
-            y_title = "Share" if display_choice == "Percent share" else units_label
-
-            tooltip_fields = [
-                alt.Tooltip("jurisdiction_label:N", title="Jurisdiction"),
-                alt.Tooltip("zoning:N", title="Zoning"),
-                alt.Tooltip(f"{value_col}:Q", title=units_label, format=",.2f" if value_col != "parcel_count" else ",d"),
-                alt.Tooltip("share:Q", title="Share", format=".1%"),
-            ]
-
-            chart = (
-                alt.Chart(plot_df)
-                .mark_bar()
-                .encode(
-                    x=alt.X("jurisdiction_label:N", title="Jurisdiction"),
-                    y=alt.Y(f"{y_field}:Q", title=y_title, stack="normalize" if display_choice == "Percent share" else "zero"),
-                    color=alt.Color("zoning:N", title="Zoning"),
-                    tooltip=tooltip_fields,
-                )
-                .properties(height=450)
-            )
-
-            st.altair_chart(chart, use_container_width=True)
+        y_field = "share" if display_choice == "Percent share" else value_col
+        y_title = "Share" if display_choice == "Percent share" else units_label
+
+        # Vega-Lite spec written directly; plot_df goes to the frontend as Arrow, so
+        # there is no Altair chart object to build, validate and convert to a dict.
+        chart_spec = {
+            "mark": "bar",
+            "height": 450,
+            "encoding": {
+                "x": {"field": "jurisdiction_label", "type": "nominal", "title": "Jurisdiction"},
+                "y": {
+                    "field": y_field,
+                    "type": "quantitative",
+                    "title": y_title,
+                    "stack": "normalize" if display_choice == "Percent share" else "zero",
+                },
+                "color": {"field": "zoning", "type": "nominal", "title": "Zoning"},
+                "tooltip": [
+                    {"field": "jurisdiction_label", "type": "nominal", "title": "Jurisdiction"},
+                    {"field": "zoning", "type": "nominal", "title": "Zoning"},
+                    {
+                        "field": value_col,
+                        "type": "quantitative",
+                        "title": units_label,
+                        "format": ",.2f" if value_col != "parcel_count" else ",d",
+                    },
+                    {"field": "share", "type": "quantitative", "title": "Share", "format": ".1%"},
+                ],
+            },
+        }
+        st.vega_lite_chart(plot_df, chart_spec, use_container_width=True)
 
         # Exports for comparison
         st.markdown("### Export")
@@ -990,9 +1269,8 @@ def main() -> None:
             st.info("Jurisdiction breakdown unavailable (parcels have no jurisdiction and it could not be inferred).")
         else:
             if labels:
-                by_jur = by_jur.copy()
-                by_jur["jurisdiction_label"] = by_jur["jurisdiction"].apply(lambda j: _format_jurisdiction(int(j), labels))
-                by_jur = by_jur[["jurisdiction_label", "parcels", "parcels_w_zoning", "pct_w_zoning"]].copy()
+                by_jur["jurisdiction_label"] = _jurisdiction_labels(by_jur["jurisdiction"], labels)
+                by_jur = by_jur[["jurisdiction_label", "parcels", "parcels_w_zoning", "pct_w_zoning"]]
                 by_jur = by_jur.rename(columns={"jurisdiction_label": "jurisdiction"})
             by_jur["pct_w_zoning"] = (by_jur["pct_w_zoning"] * 100).round(2)
             st.dataframe(
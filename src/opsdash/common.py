@@ -1,12 +1,29 @@
 from __future__ import annotations
 
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Sequence
+from typing import Any, Iterable, Sequence
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
+import shapely
+
+from opsdash.config import settings
+
+# Arrow-backed strings for id/label columns: compact buffers instead of numpy
+# object arrays of Python str, and Arrow hashing in groupby/merge. Missing values
+# stay <NA>; they do not become the literal "nan" / "None" that astype(str) gave
+# on pandas < 3.
+STRING_DTYPE = "string[pyarrow]"
+
+# CRS in which 02_build_processed computes the geom_is_valid column. Reprojection can
+# make a valid ring self-intersect, so the flag says nothing in any other CRS.
+GEOM_IS_VALID_EPSG = 4326
 
 
 def configure_logging(level: int = logging.INFO) -> None:
@@ -25,33 +42,33 @@ def latest_subdir(root: Path) -> Path:
     return subdirs[-1]
 
 
+_FIELD_SEPARATORS = str.maketrans({" ": "_", "-": "_", "/": "_"})
+
+
 def normalize_arcgis_field(name: str) -> str:
-    last = name.split(".")[-1]
-    return (
-        last.strip()
-        .replace(" ", "_")
-        .replace("-", "_")
-        .replace("/", "_")
-        .lower()
-    )
+    return name.rsplit(".", 1)[-1].strip().translate(_FIELD_SEPARATORS).lower()
 
 
 def uniquify(names: Sequence[str]) -> list[str]:
-    seen: dict[str, int] = {}
-    out: list[str] = []
-    for n in names:
-        if n not in seen:
-            seen[n] = 1
-            out.append(n)
-        else:
-            seen[n] += 1
-            out.append(f"{n}_{seen[n]}")
-    return out
+    """First occurrence keeps its name; later duplicates get `_2`, `_3`, ..."""
+    if len(set(names)) == len(names):  # the usual case: skip the pandas round trip
+        return list(names)
+    s = pd.Series(list(names), dtype=str)
+    counts = s.groupby(s, sort=False).cumcount()
+    return np.where(counts == 0, s, s + "_" + (counts + 1).astype(str)).tolist()
+
+
+def parquet_columns(path: Path, wanted: Iterable[str]) -> list[str]:
+    """Return the subset of `wanted` present in the parquet schema, in the given order."""
+    names = set(pq.read_schema(path).names)
+    return [c for c in wanted if c in names]
 
 
 def ensure_crs(gdf: gpd.GeoDataFrame, epsg: int) -> gpd.GeoDataFrame:
     if gdf.crs is None:
         return gdf.set_crs(epsg)
+    if gdf.crs.equals(epsg):
+        return gdf
     return gdf.to_crs(epsg)
 
 
@@ -60,34 +77,134 @@ def coerce_id_column(
     candidates: Iterable[str],
     fallback: str | None = None,
 ) -> pd.Series:
+    """
+    The first of `candidates` (else `fallback`, else the row number) as STRING_DTYPE.
+    Missing ids stay <NA>, so downstream groupby/merge/dropna skip them instead of
+    grouping them under a "nan" / "None" key.
+    """
     cols = set(df.columns)
     for c in candidates:
         if c in cols:
-            return df[c].astype(str)
+            return df[c].astype(STRING_DTYPE)
     if fallback and fallback in cols:
-        return df[fallback].astype(str)
-    return pd.Series(range(len(df)), index=df.index, dtype="int64").astype(str)
+        return df[fallback].astype(STRING_DTYPE)
+    return pd.Series(range(len(df)), index=df.index, dtype="int64").astype(STRING_DTYPE)
+
+
+def write_geoparquet(gdf: gpd.GeoDataFrame, path: Path) -> None:
+    """
+    Write GeoParquet with settings tuned for the pipeline's column-pruned reads:
+    native GeoArrow geometry (no per-row WKB decode on read), ZSTD compression,
+    dictionary-encoded strings, ~200k-row row groups, and a GeoParquet 1.1
+    covering bbox so readers can skip row groups spatially.
+
+    Set GEOPARQUET_GEOMETRY_ENCODING=WKB for legacy consumers.
+    """
+    encoding = settings.GEOPARQUET_GEOMETRY_ENCODING
+    kwargs: dict[str, Any] = dict(
+        index=False,
+        compression="zstd",
+        compression_level=3,
+        use_dictionary=True,
+        row_group_size=200_000,
+        schema_version="1.1.0",
+        write_covering_bbox=True,
+    )
+    try:
+        gdf.to_parquet(path, geometry_encoding=encoding, **kwargs)
+    except (ValueError, NotImplementedError):
+        # GeoArrow cannot hold every type mix (e.g. GeometryCollections from make_valid),
+        # nor an empty / all-missing geometry column
+        if encoding.upper() == "WKB":
+            raise
+        logging.getLogger(__name__).warning("%s: geometry types not GeoArrow-encodable; writing WKB.", path)
+        gdf.to_parquet(path, geometry_encoding="WKB", **kwargs)
+
+
+def _make_valid(geoms: np.ndarray) -> np.ndarray:
+    try:
+        # shapely >= 2.1: the "structure" method returns polygonal output directly
+        return shapely.make_valid(geoms, method="structure", keep_collapsed=False)
+    except (TypeError, ValueError):
+        # buffer(0) folds make_valid's GeometryCollections back to polygonal output
+        return shapely.buffer(shapely.make_valid(geoms), 0)
 
 
 def repair_geometry(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
-    out = gdf.copy()
-    out = out[out.geometry.notna() & ~out.geometry.is_empty].copy()
+    """
+    Drop missing/empty geometries and make the rest valid.
 
-    if hasattr(out.geometry, "make_valid"):
-        try:
-            out["geometry"] = out.geometry.make_valid()
-        except Exception:
-            logging.getLogger(__name__).exception("make_valid failed; falling back to buffer(0).")
+    Only invalid rows are repaired: those flagged by the geom_is_valid column written
+    by 02_build_processed when gdf is still in GEOM_IS_VALID_EPSG, otherwise those
+    failing shapely.is_valid. A flag from another CRS is dropped, not trusted.
+    When every geometry is present and valid, gdf itself is returned without a copy.
+    """
+    flag_is_current = gdf.crs is not None and gdf.crs.equals(GEOM_IS_VALID_EPSG)
+    if "geom_is_valid" in gdf.columns and not flag_is_current:
+        gdf = gdf.drop(columns="geom_is_valid")
 
-    try:
-        out["geometry"] = out.geometry.buffer(0)
-    except Exception:
-        logging.getLogger(__name__).exception("buffer(0) failed; applying row-wise fallback.")
-        out["geometry"] = out.geometry.apply(lambda geom: geom.buffer(0) if geom is not None else geom)
+    geoms = np.asarray(gdf.geometry.values)
+    keep = ~(shapely.is_missing(geoms) | shapely.is_empty(geoms))
+
+    if "geom_is_valid" in gdf.columns:
+        needs_repair = ~gdf["geom_is_valid"].to_numpy(dtype=bool, na_value=False) & keep
+    else:
+        needs_repair = ~shapely.is_valid(geoms) & keep
+
+    if keep.all() and not needs_repair.any():
+        return gdf
+
+    out = gdf[keep].copy()
+    geoms = np.array(geoms[keep], dtype=object)
+    needs_repair = needs_repair[keep]
+
+    if needs_repair.any():
+        geoms[needs_repair] = _make_valid(geoms[needs_repair])
+        out[out.geometry.name] = gpd.GeoSeries(geoms, index=out.index, crs=out.crs)
 
     return out
 
 
+def union_group(geoms: np.ndarray) -> Any:
+    """
+    Union one group of polygons. Zoning districts within a group usually form a
+    coverage (edge-matched, non-overlapping), for which GEOS CoverageUnion is far
+    cheaper than a general overlay union; anything else falls back to unary_union.
+    """
+    if hasattr(shapely, "coverage_is_valid"):  # shapely >= 2.1 / GEOS >= 3.12
+        try:
+            if shapely.coverage_is_valid(geoms):
+                return shapely.coverage_union_all(geoms)
+        except shapely.errors.GEOSException:
+            pass
+    return shapely.unary_union(geoms)
+
+
+def dissolve_by(gdf: gpd.GeoDataFrame, by: str) -> gpd.GeoDataFrame:
+    """
+    Union geometries per value of `by`; same result as gdf.dissolve(by=by, as_index=False).
+
+    Each multi-row group is one union_group() call on the raw geometry array;
+    single-row groups are passed through without a union. Groups are unioned on a
+    thread pool, since shapely releases the GIL inside GEOS.
+    """
+    geoms = np.asarray(gdf.geometry.values)
+    groups = gdf.groupby(by, sort=True).indices
+    merged = [geoms[idx[0]] if len(idx) == 1 else None for idx in groups.values()]
+
+    multi = [(i, geoms[idx]) for i, idx in enumerate(groups.values()) if len(idx) > 1]
+    workers = min(len(multi), os.cpu_count() or 1)
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            unions = list(ex.map(union_group, [block for _, block in multi]))
+    else:
+        unions = [union_group(block) for _, block in multi]
+    for (i, _), union in zip(multi, unions):
+        merged[i] = union
+
+    return gpd.GeoDataFrame({by: list(groups), "geometry": merged}, crs=gdf.crs)
+
+
 @dataclass(frozen=True)
 class Paths:
     raw_root: Path = Path("data/raw/sarpy_gis")
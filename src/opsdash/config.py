@@ -4,7 +4,7 @@ import os
 from dataclasses import dataclass
 from pathlib import Path
 
-from dotenv import load_dotenv
+from dotenv import find_dotenv, load_dotenv
 
 
 def _load_env() -> None:
@@ -14,14 +14,21 @@ def _load_env() -> None:
     - First tries .env in the current working directory (repo root when run normally).
     - Then searches upward starting from this file's location, so it still works
       even if the working directory is different.
+
+    Each file is parsed at most once; when both searches find the same .env (the usual
+    case) it is not read twice.
     """
-    load_dotenv(override=False)
+    # Same lookup as a bare load_dotenv(), resolved once so it can be compared below
+    first = find_dotenv()
+    if first:
+        load_dotenv(first, override=False)
 
     here = Path(__file__).resolve()
     for parent in [here.parent, *here.parents]:
         candidate = parent / ".env"
         if candidate.exists():
-            load_dotenv(candidate, override=False)
+            if not first or candidate.resolve() != Path(first).resolve():
+                load_dotenv(candidate, override=False)
             break
 
 
@@ -46,6 +53,9 @@ class Settings:
     # Optional (legacy)
     SARPY_STREETS_URL: str = ""
 
+    # GeoParquet geometry encoding for processed outputs ("geoarrow" or "WKB" for legacy readers)
+    GEOPARQUET_GEOMETRY_ENCODING: str = "geoarrow"
+
     @staticmethod
     def from_env() -> "Settings":
         return Settings(
@@ -54,6 +64,7 @@ class Settings:
             SARPY_NEIGHBORHOODS_LAYER_URL=os.getenv("SARPY_NEIGHBORHOODS_LAYER_URL", "").strip(),
             SARPY_NEIGHBORHOODS_DOWNLOAD_URL=os.getenv("SARPY_NEIGHBORHOODS_DOWNLOAD_URL", "").strip(),
             SARPY_STREETS_URL=os.getenv("SARPY_STREETS_URL", "").strip(),
+            GEOPARQUET_GEOMETRY_ENCODING=os.getenv("GEOPARQUET_GEOMETRY_ENCODING", "").strip() or "geoarrow",
         )
 
     def get_required(self, key: str) -> str:
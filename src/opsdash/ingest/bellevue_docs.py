@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 import logging
 from dataclasses import dataclass, asdict
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict
 
@@ -13,7 +13,7 @@ RAW_DIR = Path("data/raw/bellevue_docs")
 
 
 def utc_now_iso() -> str:
-    return datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
 def ensure_dir(path: Path) -> None:
@@ -35,7 +35,7 @@ def ingest_bellevue_docs(*, out_root: Path = RAW_DIR) -> Path:
     Creates:
       data/raw/bellevue_docs/<YYYY-MM-DD>/MANIFEST.json
     """
-    today = datetime.utcnow().strftime("%Y-%m-%d")
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
     out_dir = out_root / today
     ensure_dir(out_dir)
 
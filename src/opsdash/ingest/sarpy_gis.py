@@ -3,27 +3,43 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
-import math
+import shutil
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import asdict, dataclass
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Callable, Dict, Iterable, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from opsdash.config import settings
 
+try:
+    import orjson
+except ImportError:  # optional speedup (pip install opsdash[fast])
+    orjson = None
+
 LOGGER = logging.getLogger(__name__)
 
 RAW_DIR = Path("data/raw/sarpy_gis")
 DEFAULT_OUT_SR = 4326
+DEFAULT_BATCH_WORKERS = 8  # concurrent batch POSTs per layer
+HASH_CHUNK_BYTES = 256 * 1024  # read size for the pre-3.11 sha256_file loop
+STREAM_CHUNK_BYTES = 128 * 1024  # iter_content size for streamed downloads
+BATCH_QUERY_FORMAT = "geojson"  # `f` of the batch POSTs; recorded in the manifest
+ADAPT_WINDOW_BATCHES = 3  # consecutive fast batches before the batch size is doubled
 
 
 # -------------------------
 # Utilities
 # -------------------------
 def utc_now_iso() -> str:
-    return datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
 def ensure_dir(path: Path) -> None:
@@ -31,11 +47,27 @@ def ensure_dir(path: Path) -> None:
 
 
 def sha256_file(path: Path) -> str:
-    h = hashlib.sha256()
     with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+: read loop runs in C
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256()
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
             h.update(chunk)
-    return h.hexdigest()
+        return h.hexdigest()
+
+
+_FEATURE_ENCODER = json.JSONEncoder(ensure_ascii=False, check_circular=False, separators=(",", ":"))
+
+
+def dumps_features(feats: list[dict[str, Any]]) -> bytes:
+    """
+    Compact UTF-8 JSON per feature, one feature per line, for a FeatureCollection body.
+    Uses orjson when installed; the stdlib encoder is configured to emit the same
+    compact layout (float exponents aside, e.g. 1e-7 vs 1e-07).
+    """
+    if orjson is not None:
+        return b",\n".join(map(orjson.dumps, feats))
+    return ",\n".join(map(_FEATURE_ENCODER.encode, feats)).encode("utf-8")
 
 
 def normalize_layer_url(layer_url: str) -> str:
@@ -62,9 +94,13 @@ def post_form_json(
 ) -> dict[str, Any]:
     """
     ArcGIS endpoints often accept form-encoded POSTs. This returns parsed JSON.
+    With orjson installed the body bytes are parsed directly, without first
+    decoding them to a str copy.
     """
     resp = session.post(url, data=data, timeout=timeout_s)
     resp.raise_for_status()
+    if orjson is not None:
+        return orjson.loads(resp.content)
     return resp.json()
 
 
@@ -74,15 +110,97 @@ def stream_get_to_file(
     out_path: Path,
     *,
     timeout_s: int,
-    chunk_bytes: int = 1024 * 1024,
-) -> None:
+    chunk_bytes: int = STREAM_CHUNK_BYTES,
+) -> str:
+    """Stream url to out_path; returns the SHA-256 hex digest of the bytes written."""
     ensure_dir(out_path.parent)
+    h = hashlib.sha256()
     with session.get(url, stream=True, timeout=timeout_s) as resp:
         resp.raise_for_status()
         with out_path.open("wb") as f:
             for chunk in resp.iter_content(chunk_size=chunk_bytes):
                 if chunk:
                     f.write(chunk)
+                    h.update(chunk)
+    return h.hexdigest()
+
+
+def _batch_too_large(exc: requests.RequestException) -> bool:
+    """True for failures that mean the request was too big: 413/414 or a read timeout."""
+    if isinstance(exc, requests.Timeout):
+        return True
+    return exc.response is not None and exc.response.status_code in (413, 414)
+
+
+def _reuse_previous_output(
+    previous: Optional[dict[str, Any]],
+    out_path: Path,
+    ids_sha256: str,
+    last_edit_date: Optional[int],
+    query: dict[str, Any],
+) -> bool:
+    """
+    Copy a previous run's layer output to out_path when it is known to be current:
+    the same query parameters (where / out_sr / query_format), the same objectId list,
+    the same (reported) lastEditDate, and a file that still matches its recorded
+    digest. An unchanged id list alone is not enough, since edits keep their
+    objectIds. Returns True when out_path holds that output.
+    """
+    if not previous or last_edit_date is None:
+        return False
+    if previous.get("objectid_list_sha256") != ids_sha256 or previous.get("last_edit_date") != last_edit_date:
+        return False
+    if any(previous.get(key) != value for key, value in query.items()):
+        return False
+    src = Path(previous.get("output_path", ""))
+    if not src.is_file() or sha256_file(src) != previous.get("sha256"):
+        return False
+    if src.resolve() != out_path.resolve():
+        # A copy, not a hard link: a later rewrite of out_path must not touch src
+        shutil.copyfile(src, out_path)
+    return True
+
+
+def latest_manifest_outputs(out_root: Path) -> Dict[str, Any]:
+    """The "outputs" of the newest readable MANIFEST.json under out_root, or {}."""
+    for manifest_path in sorted(out_root.glob("*/MANIFEST.json"), reverse=True):
+        try:
+            return json.loads(manifest_path.read_text(encoding="utf-8")).get("outputs") or {}
+        except (OSError, ValueError):
+            continue
+    return {}
+
+
+def make_session(
+    *,
+    pool_maxsize: int = DEFAULT_BATCH_WORKERS,
+    retry_read_timeouts: bool = True,
+) -> requests.Session:
+    """
+    Session whose keep-alive pool can hold one connection per concurrent batch
+    request, so parallel POSTs to the same host reuse connections instead of
+    opening (and discarding) extra ones.
+
+    Transient 429/5xx responses and dropped connections are retried with backoff,
+    so one flaky batch does not abort a whole layer. The ArcGIS query POSTs are
+    read-only, so POST is safe to retry.
+
+    With retry_read_timeouts=False a read timeout is raised at once (as
+    requests.ReadTimeout) instead of being re-sent; connect errors and 429/5xx
+    are still retried.
+    """
+    retry = Retry(
+        total=5,
+        read=None if retry_read_timeouts else False,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+    )
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 
 # -------------------------
@@ -100,6 +218,11 @@ class ArcGisLayerIngestResult:
     max_record_count: int
     features_written: int
     sha256: str
+    objectid_list_sha256: str = ""
+    where: str = ""
+    out_sr: Optional[int] = None
+    query_format: str = ""
+    last_edit_date: Optional[int] = None  # layer editingInfo.lastEditDate (epoch ms), if reported
 
 
 @dataclass(frozen=True)
@@ -126,14 +249,25 @@ def ingest_arcgis_layer_to_geojson(
     timeout_meta_s: int = 60,
     timeout_ids_s: int = 120,
     timeout_batch_s: int = 180,
+    max_workers: int = DEFAULT_BATCH_WORKERS,
+    max_record_count: Optional[int] = None,
+    previous: Optional[dict[str, Any]] = None,
 ) -> ArcGisLayerIngestResult:
     """
     Robust ArcGIS ingestion for MapServer/FeatureServer layers:
 
-      1) Fetch layer metadata (pjson)
+      1) Fetch layer metadata (pjson), unless max_record_count is given
       2) Fetch all objectIds (returnIdsOnly)
-      3) Fetch features by objectIds in small batches via POST
-      4) Stream to a single GeoJSON FeatureCollection on disk
+      3) Fetch features by objectIds in small batches via POST, up to max_workers at once
+      4) Stream to a single GeoJSON FeatureCollection on disk, in objectId order
+
+    The metadata is only read for maxRecordCount. Pass the layer's real
+    max_record_count to skip that request; a value above the server's limit would
+    make it truncate batches.
+
+    previous is this layer's entry from an earlier MANIFEST.json. Its output is
+    copied instead of re-downloaded when it is known to be current; see
+    _reuse_previous_output().
     """
     layer_url = normalize_layer_url(layer_url)
     if not layer_url:
@@ -143,8 +277,12 @@ def ingest_arcgis_layer_to_geojson(
     query_url = f"{layer_url}/query"
 
     # 1) metadata
-    meta = post_form_json(session, layer_url, {"f": "pjson"}, timeout_s=timeout_meta_s)
-    max_rc = int(meta.get("maxRecordCount", 1000) or 1000)
+    meta: dict[str, Any] = {}
+    if max_record_count is not None:
+        max_rc = max_record_count
+    else:
+        meta = post_form_json(session, layer_url, {"f": "pjson"}, timeout_s=timeout_meta_s)
+        max_rc = int(meta.get("maxRecordCount", 1000) or 1000)
 
     # 2) ids
     ids_resp = post_form_json(
@@ -162,55 +300,149 @@ def ingest_arcgis_layer_to_geojson(
 
     object_ids = sorted(object_ids)
     total_ids = len(object_ids)
+    ids_sha256 = hashlib.sha256(",".join(map(str, object_ids)).encode()).hexdigest()
+    last_edit_date = (meta.get("editingInfo") or {}).get("lastEditDate")
 
-    # keep conservative to avoid proxy/body limits; also honor max_rc if smaller
+    # start conservative to avoid proxy/body limits (honoring max_rc if smaller);
+    # the writer loop below grows it toward max_rc while batches stay fast
     bs = min(batch_size, max_rc) if max_rc > 0 else batch_size
-    n_batches = math.ceil(total_ids / bs)
+    max_bs = max(bs, max_rc)
+    n_batches = -(-total_ids // bs)
+    workers = max(1, min(max_workers, n_batches))
 
     out_path = out_dir / f"{out_name}.geojson"
     features_written = 0
 
-    LOGGER.info("%s: %s objectIds, batch_size=%s (%s batches)", out_name, f"{total_ids:,}", bs, n_batches)
+    # Everything besides the ids and edit date that shapes the output file
+    query: dict[str, Any] = {"where": where, "out_sr": out_sr, "query_format": BATCH_QUERY_FORMAT}
 
-    # 3–4) stream GeoJSON
-    with out_path.open("w", encoding="utf-8", newline="\n") as f:
-        f.write('{"type":"FeatureCollection","features":[\n')
-        first = True
+    if _reuse_previous_output(previous, out_path, ids_sha256, last_edit_date, query):
+        LOGGER.info(
+            "%s: unchanged since %s (same objectIds, lastEditDate %s); reused %s",
+            out_name,
+            previous["retrieved_at"],
+            last_edit_date,
+            previous["output_path"],
+        )
+        return ArcGisLayerIngestResult(
+            name=out_name,
+            layer_url=layer_url,
+            query_url=query_url,
+            output_path=str(out_path),
+            retrieved_at=previous["retrieved_at"],
+            objectid_count=total_ids,
+            batch_size=bs,
+            max_record_count=max_rc,
+            features_written=previous["features_written"],
+            sha256=previous["sha256"],
+            objectid_list_sha256=ids_sha256,
+            last_edit_date=last_edit_date,
+            **query,
+        )
 
-        for i in range(n_batches):
-            batch = object_ids[i * bs : (i + 1) * bs]
+    LOGGER.info(
+        "%s: %s objectIds, initial batch_size=%s (%s batches, %s workers)",
+        out_name,
+        f"{total_ids:,}",
+        bs,
+        n_batches,
+        workers,
+    )
 
+    # Batch POSTs use their own session whose Retry does not re-send read timeouts, so
+    # a batch too slow for the server reaches the split in fetch_batch at once instead
+    # of after every retry. Headers, auth and proxies follow the caller's session.
+    batch_session = make_session(pool_maxsize=workers, retry_read_timeouts=False)
+    batch_session.headers.update(session.headers)
+    batch_session.auth = session.auth
+    batch_session.proxies.update(session.proxies)
+    batch_session.verify = session.verify
+
+    def fetch_batch(batch: list[int]) -> tuple[int, bytes, Optional[float]]:
+        """Returns (feature count, encoded body, seconds taken; None if the batch had to be split)."""
+        t0 = time.perf_counter()
+        try:
             resp = post_form_json(
-                session,
+                batch_session,
                 query_url,
                 {
                     "objectIds": ",".join(map(str, batch)),
                     "outFields": "*",
                     "outSR": str(out_sr),
-                    "f": "geojson",
+                    "f": BATCH_QUERY_FORMAT,
                 },
                 timeout_s=timeout_batch_s,
             )
-
-            feats = resp.get("features") or []
-            for feat in feats:
-                if not first:
-                    f.write(",\n")
-                f.write(json.dumps(feat))
-                first = False
-
-            features_written += len(feats)
+        except requests.RequestException as exc:
+            if len(batch) < 2 or not _batch_too_large(exc):
+                raise
+            mid = len(batch) // 2
+            LOGGER.warning("%s: batch of %s failed (%s); retrying as two halves", out_name, len(batch), exc)
+            n_a, body_a, _ = fetch_batch(batch[:mid])
+            n_b, body_b, _ = fetch_batch(batch[mid:])
+            return n_a + n_b, b",\n".join(b for b in (body_a, body_b) if b), None
+
+        # Encoded on the worker thread, overlapping other batches' network waits
+        feats = resp.get("features") or []
+        return len(feats), dumps_features(feats), time.perf_counter() - t0
+
+    # 3–4) fetch batches concurrently, stream GeoJSON in batch order. At most
+    # 2 * workers batches are in flight or buffered, so memory stays bounded even
+    # when an early batch is slow. The digest is updated as bytes are written, so
+    # the output is not re-read to hash it.
+    #
+    # The batch size adapts: it doubles (up to maxRecordCount) after
+    # ADAPT_WINDOW_BATCHES consecutive batches each finish within a quarter of the
+    # batch timeout. A batch that has to be split caps it below that batch's size.
+    cur_bs = bs
+    recent: deque[float] = deque(maxlen=ADAPT_WINDOW_BATCHES)
+    h = hashlib.sha256()
+    with batch_session, ThreadPoolExecutor(max_workers=workers) as ex, out_path.open("wb") as f:
+
+        def write(b: bytes) -> None:
+            f.write(b)
+            h.update(b)
+
+        write(b'{"type":"FeatureCollection","features":[\n')
+
+        pending: deque[tuple[int, Future[tuple[int, bytes, Optional[float]]]]] = deque()
+        offset = 0
+        while offset < total_ids or pending:
+            while offset < total_ids and len(pending) < 2 * workers:
+                batch = object_ids[offset : offset + cur_bs]
+                pending.append((len(batch), ex.submit(fetch_batch, batch)))
+                offset += cur_bs
+
+            size, fut = pending.popleft()
+            n_feats, body, elapsed = fut.result()
+            if n_feats:
+                if features_written:
+                    write(b",\n")
+                write(body)
+
+            features_written += n_feats
             LOGGER.info(
-                "%s: batch %s/%s (+%s, total %s/%s)",
+                "%s: +%s, total %s/%s",
                 out_name,
-                i + 1,
-                n_batches,
-                len(feats),
+                n_feats,
                 f"{features_written:,}",
                 f"{total_ids:,}",
             )
 
-        f.write("\n]}\n")
+            if elapsed is None:
+                max_bs = min(max_bs, max(1, size // 2))
+                recent.clear()
+                if cur_bs > max_bs:
+                    cur_bs = max_bs
+                    LOGGER.info("%s: batch_size -> %s", out_name, cur_bs)
+                continue
+            recent.append(elapsed)
+            if cur_bs < max_bs and len(recent) == recent.maxlen and max(recent) < timeout_batch_s / 4:
+                cur_bs = min(cur_bs * 2, max_bs)
+                recent.clear()
+                LOGGER.info("%s: batch_size -> %s", out_name, cur_bs)
+
+        write(b"\n]}\n")
 
     return ArcGisLayerIngestResult(
         name=out_name,
@@ -222,7 +454,10 @@ def ingest_arcgis_layer_to_geojson(
         batch_size=bs,
         max_record_count=max_rc,
         features_written=features_written,
-        sha256=sha256_file(out_path),
+        sha256=h.hexdigest(),
+        objectid_list_sha256=ids_sha256,
+        last_edit_date=last_edit_date,
+        **query,
     )
 
 
@@ -248,14 +483,14 @@ def ingest_download_geojson(
     out_path = out_dir / f"{out_name}.geojson"
 
     LOGGER.info("%s: downloading GeoJSON from %s", out_name, url)
-    stream_get_to_file(session, url, out_path, timeout_s=timeout_s)
+    sha256 = stream_get_to_file(session, url, out_path, timeout_s=timeout_s)
 
     return DownloadIngestResult(
         name=out_name,
         download_url=url,
         output_path=str(out_path),
         retrieved_at=utc_now_iso(),
-        sha256=sha256_file(out_path),
+        sha256=sha256,
     )
 
 
@@ -274,9 +509,11 @@ def ingest_sarpy_all_available(*, out_root: Path = RAW_DIR) -> Dict[str, Path]:
       - SARPY_NEIGHBORHOODS_LAYER_URL (ArcGIS layer root URL)
       - SARPY_NEIGHBORHOODS_DOWNLOAD_URL (direct GeoJSON download; preferred if set)
     """
-    today = datetime.utcnow().strftime("%Y-%m-%d")
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
     out_dir = out_root / today
     ensure_dir(out_dir)
+    # Read before this run's manifest is written; lets unchanged layers be reused
+    previous_outputs = latest_manifest_outputs(out_root)
 
     manifest: Dict[str, Any] = {
         "retrieved_at": utc_now_iso(),
@@ -284,60 +521,69 @@ def ingest_sarpy_all_available(*, out_root: Path = RAW_DIR) -> Dict[str, Path]:
         "notes": [
             "ArcGIS layer ingests use POST + objectId batching + streamed GeoJSON to avoid URL-length limits.",
             "If a Hub download URL is provided for neighborhoods, it is preferred over REST layer scraping.",
+            "A layer whose objectId list and lastEditDate match the previous manifest is copied from that run.",
         ],
     }
 
-    outputs: Dict[str, Path] = {}
+    # Layers are independent and I/O-bound, so they are ingested concurrently. Each job
+    # gets its own Session (and connection pool); results are collected in job order.
+    jobs: Dict[str, Callable[[requests.Session], Any]] = {}
+
+    # --- Parcels (required)
+    parcels_url = settings.get_required("SARPY_PARCELS_LAYER_URL")
+    jobs["parcels"] = partial(
+        ingest_arcgis_layer_to_geojson,
+        layer_url=parcels_url,
+        out_dir=out_dir,
+        out_name="sarpy_tax_parcels",
+        batch_size=200,
+        previous=previous_outputs.get("parcels"),
+    )
 
-    with requests.Session() as session:
-        # --- Parcels (required)
-        parcels_url = settings.get_required("SARPY_PARCELS_LAYER_URL")
-        parcels_res = ingest_arcgis_layer_to_geojson(
-            session=session,
-            layer_url=parcels_url,
+    # --- Zoning (optional)
+    zoning_url = normalize_layer_url(getattr(settings, "SARPY_ZONING_LAYER_URL", ""))
+    if zoning_url:
+        jobs["zoning"] = partial(
+            ingest_arcgis_layer_to_geojson,
+            layer_url=zoning_url,
             out_dir=out_dir,
-            out_name="sarpy_tax_parcels",
+            out_name="sarpy_zoning",
             batch_size=200,
+            previous=previous_outputs.get("zoning"),
         )
-        outputs["parcels"] = Path(parcels_res.output_path)
-        manifest["outputs"]["parcels"] = asdict(parcels_res)
-
-        # --- Zoning (optional)
-        zoning_url = normalize_layer_url(getattr(settings, "SARPY_ZONING_LAYER_URL", ""))
-        if zoning_url:
-            zoning_res = ingest_arcgis_layer_to_geojson(
-                session=session,
-                layer_url=zoning_url,
-                out_dir=out_dir,
-                out_name="sarpy_zoning",
-                batch_size=200,
-            )
-            outputs["zoning"] = Path(zoning_res.output_path)
-            manifest["outputs"]["zoning"] = asdict(zoning_res)
-
-        # --- Neighborhoods (optional; prefer direct download)
-        n_download_url = (getattr(settings, "SARPY_NEIGHBORHOODS_DOWNLOAD_URL", "") or "").strip()
-        n_layer_url = normalize_layer_url(getattr(settings, "SARPY_NEIGHBORHOODS_LAYER_URL", ""))
-
-        if n_download_url:
-            n_res = ingest_download_geojson(
-                session=session,
-                download_url=n_download_url,
-                out_dir=out_dir,
-                out_name="sarpy_neighborhoods",
-            )
-            outputs["neighborhoods"] = Path(n_res.output_path)
-            manifest["outputs"]["neighborhoods"] = asdict(n_res)
-        elif n_layer_url:
-            n_res = ingest_arcgis_layer_to_geojson(
-                session=session,
-                layer_url=n_layer_url,
-                out_dir=out_dir,
-                out_name="sarpy_neighborhoods",
-                batch_size=200,
-            )
-            outputs["neighborhoods"] = Path(n_res.output_path)
-            manifest["outputs"]["neighborhoods"] = asdict(n_res)
+
+    # --- Neighborhoods (optional; prefer direct download)
+    n_download_url = (getattr(settings, "SARPY_NEIGHBORHOODS_DOWNLOAD_URL", "") or "").strip()
+    n_layer_url = normalize_layer_url(getattr(settings, "SARPY_NEIGHBORHOODS_LAYER_URL", ""))
+
+    if n_download_url:
+        jobs["neighborhoods"] = partial(
+            ingest_download_geojson,
+            download_url=n_download_url,
+            out_dir=out_dir,
+            out_name="sarpy_neighborhoods",
+        )
+    elif n_layer_url:
+        jobs["neighborhoods"] = partial(
+            ingest_arcgis_layer_to_geojson,
+            layer_url=n_layer_url,
+            out_dir=out_dir,
+            out_name="sarpy_neighborhoods",
+            batch_size=200,
+            previous=previous_outputs.get("neighborhoods"),
+        )
+
+    def run_job(job: Callable[[requests.Session], Any]) -> Any:
+        with make_session() as session:
+            return job(session=session)
+
+    outputs: Dict[str, Path] = {}
+    with ThreadPoolExecutor(max_workers=len(jobs)) as ex:
+        futures = {key: ex.submit(run_job, job) for key, job in jobs.items()}
+        for key, fut in futures.items():
+            res = fut.result()
+            outputs[key] = Path(res.output_path)
+            manifest["outputs"][key] = asdict(res)
 
     (out_dir / "MANIFEST.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
     LOGGER.info("Wrote manifest: %s", out_dir / "MANIFEST.json")
@@ -0,0 +1,82 @@
+"""
+Missing ids and labels stay <NA> in the STRING_DTYPE columns; they must not turn
+into the literal strings "nan" / "None".
+"""
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import box
+
+from opsdash.common import STRING_DTYPE, coerce_id_column
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+
+
+def _load_build_processed():
+    spec = importlib.util.spec_from_file_location("build_processed", SCRIPTS_DIR / "02_build_processed.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _assert_missing_is_na(series: pd.Series, present: list[str]) -> None:
+    assert series.dtype == STRING_DTYPE
+    assert series.dropna().tolist() == present
+    assert int(series.isna().sum()) == len(series) - len(present)
+    assert not series.isin(["nan", "None", "<NA>"]).any()
+
+
+def _layer(**columns) -> gpd.GeoDataFrame:
+    n = len(next(iter(columns.values())))
+    return gpd.GeoDataFrame(columns, geometry=[box(i, 0, i + 1, 1) for i in range(n)], crs=4326)
+
+
+@pytest.mark.parametrize("values", [["A1", None, np.nan], ["A1", None, None]])
+def test_coerce_id_column_keeps_missing_candidate_ids_na(values):
+    df = pd.DataFrame({"parid": pd.Series(values, dtype=object)})
+    _assert_missing_is_na(coerce_id_column(df, candidates=("parcel_id", "parid")), ["A1"])
+
+
+def test_coerce_id_column_keeps_missing_fallback_ids_na():
+    df = pd.DataFrame({"objectid": pd.Series([7.0, np.nan, 9.0])})
+    out = coerce_id_column(df, candidates=("parcel_id",), fallback="objectid")
+    assert out.dtype == STRING_DTYPE
+    assert out.isna().tolist() == [False, True, False]
+    assert not out.isin(["nan", "None", "<NA>"]).any()
+
+
+def test_to_processed_zoning_keeps_missing_labels_na():
+    build = _load_build_processed()
+    raw = _layer(
+        OBJECTID=[1, 2, 3],
+        ZONECLASS=pd.Series(["AG", None, np.nan], dtype=object),
+        ZONEDESC=pd.Series([None, "Agricultural", np.nan], dtype=object),
+    )
+    out = build.to_processed(raw, "zoning")
+
+    _assert_missing_is_na(out["zoning_id"], ["1", "2", "3"])
+    _assert_missing_is_na(out["zoning_code"], ["AG"])
+    _assert_missing_is_na(out["zoning_desc"], ["Agricultural"])
+
+
+def test_to_processed_neighborhoods_keeps_missing_names_na():
+    build = _load_build_processed()
+    raw = _layer(OBJECTID=[1, 2], NAME=pd.Series([None, "Olde Towne"], dtype=object))
+    out = build.to_processed(raw, "neighborhoods")
+
+    _assert_missing_is_na(out["neighborhood_id"], ["1", "2"])
+    _assert_missing_is_na(out["neighborhood_name"], ["Olde Towne"])
+
+
+def test_to_processed_parcels_keeps_missing_parcel_ids_na():
+    build = _load_build_processed()
+    raw = _layer(OBJECTID=[1, 2], PIN=pd.Series(["0101", None], dtype=object))
+    out = build.to_processed(raw, "parcels")
+
+    _assert_missing_is_na(out["parcel_id"], ["0101"])